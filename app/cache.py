@@ -25,6 +25,23 @@ _redis_client: Any = None
 # In-memory cache as fallback
 _memory_cache: dict[str, tuple[dict, float]] = {}
 
+# In-memory fallback for pre-serialized JSON payloads
+_memory_bytes_cache: dict[str, tuple[bytes, float]] = {}
+
+# Short-lived in-process layer in front of Redis for hot payloads.
+# Redis stays the source of truth; entries here live only a few seconds.
+LOCAL_CACHE_TTL = 5  # seconds
+LOCAL_CACHE_MAX_KEYS = 64
+_local_cache: dict[str, tuple[bytes, float]] = {}
+
+
+def _set_local(key: str, value: bytes) -> None:
+    """Store payload in the in-process layer (FIFO eviction)."""
+    _local_cache.pop(key, None)
+    _local_cache[key] = (value, time.time() + LOCAL_CACHE_TTL)
+    if len(_local_cache) > LOCAL_CACHE_MAX_KEYS:
+        _local_cache.pop(next(iter(_local_cache)))
+
 
 async def get_redis() -> Any | None:
     """Return Redis client (singleton pattern).
@@ -130,6 +147,90 @@ async def set_cached(
     return True
 
 
+async def get_cached_bytes(key: str) -> bytes | None:
+    """Get pre-serialized JSON payload from cache (Redis or memory).
+
+    Unlike get_cached, the value is returned as stored, without decoding,
+    so it can be written straight into an HTTP response body. Hot keys are
+    served from a short-lived in-process layer to skip the Redis roundtrip.
+
+    Args:
+        key: Cache key
+
+    Returns:
+        Raw JSON bytes or None if not found
+    """
+    # In-process layer (a few seconds of staleness at most)
+    local = _local_cache.get(key)
+    if local is not None:
+        value, expires_at = local
+        if time.time() < expires_at:
+            logger.debug(f"Cache HIT (local): {key}")
+            return value
+        del _local_cache[key]
+
+    # Try Redis
+    try:
+        client = await get_redis()
+        if client:
+            value = await client.get(key)
+            if value:
+                logger.debug(f"Cache HIT (Redis): {key}")
+                value = value.encode() if isinstance(value, str) else value
+                _set_local(key, value)
+                return value
+    except Exception as e:
+        logger.warning(f"Error reading from Redis: {e}")
+
+    # Fallback: memory
+    if key in _memory_bytes_cache:
+        value, expires_at = _memory_bytes_cache[key]
+        if time.time() < expires_at:
+            logger.debug(f"Cache HIT (memory): {key}")
+            return value
+        else:
+            # Expired
+            del _memory_bytes_cache[key]
+            logger.debug(f"Cache expired (memory): {key}")
+
+    logger.debug(f"Cache MISS: {key}")
+    return None
+
+
+async def set_cached_bytes(
+    key: str,
+    value: bytes,
+    ttl: int | None = None,
+) -> bool:
+    """Save pre-serialized JSON payload to cache (Redis and memory).
+
+    Args:
+        key: Cache key
+        value: Serialized JSON body
+        ttl: Time to live in seconds (default: settings.cache_ttl_insight)
+
+    Returns:
+        True if saved successfully
+    """
+    ttl = ttl or settings.cache_ttl_insight
+
+    # Save to Redis
+    try:
+        client = await get_redis()
+        if client:
+            await client.setex(key, ttl, value)
+            logger.debug(f"Cache SET (Redis): {key} TTL={ttl}s")
+    except Exception as e:
+        logger.warning(f"Error saving to Redis: {e}")
+
+    # Always save to memory as well (backup)
+    _memory_bytes_cache[key] = (value, time.time() + ttl)
+    _set_local(key, value)
+    logger.debug(f"Cache SET (memory): {key} TTL={ttl}s")
+
+    return True
+
+
 async def delete_cached(key: str) -> bool:
     """Remove value from cache.
 
@@ -150,6 +251,8 @@ async def delete_cached(key: str) -> bool:
     # Remove from memory
     if key in _memory_cache:
         del _memory_cache[key]
+    _memory_bytes_cache.pop(key, None)
+    _local_cache.pop(key, None)
 
     return True
 
@@ -173,10 +276,13 @@ async def clear_forex_cache() -> int:
         logger.warning(f"Error clearing Redis: {e}")
 
     # Clear from memory
-    memory_keys = [k for k in _memory_cache if k.startswith("forex:")]
-    for k in memory_keys:
-        del _memory_cache[k]
-        count += 1
+    for memory in (_memory_cache, _memory_bytes_cache):
+        memory_keys = [k for k in memory if k.startswith("forex:")]
+        for k in memory_keys:
+            del memory[k]
+            count += 1
+    for k in [k for k in _local_cache if k.startswith("forex:")]:
+        del _local_cache[k]
 
     return count
 
@@ -203,7 +309,7 @@ async def get_cache_status() -> dict[str, Any]:
     return {
         "redis": redis_status,
         "redis_keys": redis_keys,
-        "memory_keys": len(_memory_cache),
+        "memory_keys": len(_memory_cache) + len(_memory_bytes_cache),
     }
 
 
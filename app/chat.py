@@ -1,5 +1,6 @@
 """Chat WebSocket endpoint with E2B code execution."""
 
+import asyncio
 import json
 import logging
 import re
@@ -7,8 +8,6 @@ import uuid
 from datetime import datetime
 from typing import Any
 
-import pandas as pd
-import yfinance as yf
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect
 from pydantic import BaseModel
 
@@ -28,11 +27,11 @@ _rag: SimpleRAG | None = None
 YFINANCE_CACHE_TTL = 300
 
 
-async def get_cached_ohlc_data() -> list[dict]:
+async def get_cached_ohlc_data() -> dict[str, list]:
     """Get OHLC data with caching.
 
     Returns:
-        List of OHLC records
+        OHLC columns (column name -> list of values)
     """
     cache_key = f"chat:ohlc:{settings.symbol}:3mo"
 
@@ -42,9 +41,18 @@ async def get_cached_ohlc_data() -> list[dict]:
         logger.debug("Using cached OHLC data")
         return cached
 
+    # Import apenas quando necessário: pandas + yfinance custam ~0.5s no
+    # boot e só são usados quando o cache de OHLC do chat expira
+    import pandas as pd
+    import yfinance as yf
+
     # Baixar dados frescos
+    # yf.download é bloqueante; roda em thread para não travar o event loop
+    # (o yfinance já reutiliza uma única sessão HTTP entre chamadas)
     logger.debug("Fetching fresh OHLC data from yfinance")
-    df = yf.download(settings.symbol, period="3mo", progress=False)
+    df = await asyncio.to_thread(
+        yf.download, settings.symbol, period="3mo", progress=False
+    )
 
     # Flatten multi-level columns if present
     if hasattr(df.columns, 'levels'):
@@ -55,9 +63,10 @@ async def get_cached_ohlc_data() -> list[dict]:
     df['Date'] = pd.to_datetime(df['Date'])
     df = df[df['Date'].dt.dayofweek < 5]  # Keep only Mon-Fri
 
-    # Convert to JSON-serializable format
+    # Convert to JSON-serializable format (colunar: cada nome de coluna
+    # aparece uma vez, em vez de uma vez por linha)
     df['Date'] = df['Date'].astype(str)
-    ohlc_data = df.to_dict(orient="records")
+    ohlc_data = df.to_dict(orient="list")
 
     # Salvar no cache
     await set_cached(cache_key, ohlc_data, ttl=YFINANCE_CACHE_TTL)
@@ -73,7 +82,11 @@ def get_rag() -> SimpleRAG:
     """
     global _rag
     if _rag is None:
-        _rag = SimpleRAG(settings.rag_db_path)
+        _rag = SimpleRAG(
+            settings.rag_db_path,
+            quantize=settings.rag_int8,
+            query_cache_threshold=settings.rag_query_cache_threshold,
+        )
     return _rag
 
 
@@ -147,8 +160,32 @@ def extract_python_code(text: str) -> list[str]:
     Returns:
         List of code strings
     """
-    matches = CODE_BLOCK_PATTERN.findall(text)
-    return [m.strip() for m in matches if m.strip()]
+    blocks = map(str.strip, CODE_BLOCK_PATTERN.findall(text))
+    return [block for block in blocks if block]
+
+
+# Dangerous operations in generated code, grouped by how they are matched
+BLOCKED_MODULE_ATTRS = ("os", "sys")  # os.<attr>
+BLOCKED_NAMES = (
+    "subprocess", "eval", "exec", "requests", "urllib", "importlib",
+    "__class__", "__bases__", "__subclasses__",
+)
+BLOCKED_CALLS = (  # name(...)
+    "open", "globals", "locals", "getattr", "setattr", "delattr",
+    "compile", "breakpoint",
+)
+BLOCKED_SUBSTRINGS = ("__import__", "__builtins__")
+
+# One factored regex: a single scan over the code instead of one search
+# per pattern (alternatives share the leading \b)
+DANGEROUS_PATTERN = re.compile(
+    rf"\b(?:(?:{'|'.join(BLOCKED_MODULE_ATTRS)})\."
+    rf"|(?:{'|'.join(BLOCKED_NAMES)})\b"
+    rf"|(?:{'|'.join(BLOCKED_CALLS)})\s*\()"
+    rf"|{'|'.join(map(re.escape, BLOCKED_SUBSTRINGS))}"
+)
+
+IMPORT_PATTERN = re.compile(r"(?:from|import)\s+(\w+)")
 
 
 def validate_code(code: str) -> tuple[bool, str]:
@@ -166,38 +203,12 @@ def validate_code(code: str) -> tuple[bool, str]:
     allowed_imports = settings.chat_allowed_imports.split(",")
 
     # Check for dangerous patterns
-    dangerous_patterns = [
-        r"\bos\.",
-        r"\bsys\.",
-        r"\bsubprocess\b",
-        r"\beval\b",
-        r"\bexec\b",
-        r"\bopen\(",
-        r"__import__",
-        r"\brequests\b",
-        r"\burllib\b",
-        # Padrões adicionais de segurança
-        r"__builtins__",
-        r"\bglobals\s*\(",
-        r"\blocals\s*\(",
-        r"\bgetattr\s*\(",
-        r"\bsetattr\s*\(",
-        r"\bdelattr\s*\(",
-        r"\bimportlib\b",
-        r"\bcompile\s*\(",
-        r"\bbreakpoint\s*\(",
-        r"\b__class__\b",
-        r"\b__bases__\b",
-        r"\b__subclasses__\b",
-    ]
-
-    for pattern in dangerous_patterns:
-        if re.search(pattern, code):
-            return False, f"Código contém operação não permitida: {pattern}"
+    match = DANGEROUS_PATTERN.search(code)
+    if match:
+        return False, f"Código contém operação não permitida: {match.group(0)}"
 
     # Extract imports and validate
-    import_pattern = re.compile(r"(?:from|import)\s+(\w+)")
-    imports = import_pattern.findall(code)
+    imports = IMPORT_PATTERN.findall(code)
 
     for imp in imports:
         if imp not in allowed_imports:
@@ -493,7 +504,7 @@ async def chat_websocket(websocket: WebSocket, session_id: str | None = None):
                         ohlc_data = await get_cached_ohlc_data()
 
                         # Execute in sandbox
-                        code_result = execute_analysis_code(
+                        code_result = await execute_analysis_code(
                             code,
                             {"ohlc_data": ohlc_data},
                         )
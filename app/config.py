@@ -25,6 +25,7 @@ class Settings(BaseSettings):
     redis_url: str = "redis://localhost:6379"
     cache_ttl_insight: int = 3600  # 1 hour for full insight
     cache_ttl_technical: int = 14400  # 4 hours for technical only
+    cache_ttl_ohlc: int = 300  # 5 minutes for raw OHLC bars (in-process)
 
     # LLM - Minimax (primary)
     llm_timeout: int = 30
@@ -48,6 +49,8 @@ class Settings(BaseSettings):
     # E2B Sandbox (execução isolada de código de análise)
     e2b_api_key: str = ""
     e2b_timeout: int = 180  # segundos
+    e2b_pool_size: int = 2  # sandboxes executando código em paralelo
+    e2b_acquire_timeout: int = 60  # segundos aguardando um sandbox livre
 
     # News
     news_query: str = "dólar real câmbio brasil"
@@ -63,7 +66,9 @@ class Settings(BaseSettings):
     # RAG - Retrieval Augmented Generation
     rag_db_path: str = "./data/rag.db"  # SQLite-vec database
     rag_top_k: int = 3  # Number of results to retrieve
-    rag_min_similarity: float = 0.3  # Minimum similarity threshold
+    rag_min_similarity: float = 0.75  # Minimum cosine similarity threshold
+    rag_int8: bool = False  # Store embeddings as int8 (vec_docs_int8 table)
+    rag_query_cache_threshold: float = 0.97  # Reuse results for queries this similar (0 = off)
 
     # Docs Chat - Documentation interactive chat
     docs_chat_enabled: bool = True
@@ -165,6 +165,49 @@ REGRAS OBRIGATÓRIAS:
 5. Escreva em português brasileiro"""
 
 
+def build_insight_prompt(
+    classification: ClassificationResult,
+    news: list[NewsItem],
+) -> str:
+    """Build the insight prompt from technical analysis and news.
+
+    Args:
+        classification: Resultado da análise técnica
+        news: Lista de notícias para contexto
+
+    Returns:
+        Prompt pronto para o LLM
+    """
+    return INSIGHT_PROMPT.format(
+        classification=classification.classification.value,
+        confidence=classification.confidence,
+        current_price=classification.indicators.current_price,
+        sma20=classification.indicators.sma20,
+        sma50=classification.indicators.sma50,
+        rsi=classification.indicators.rsi,
+        bb_lower=classification.indicators.bollinger_lower,
+        bb_upper=classification.indicators.bollinger_upper,
+        explanation=classification.explanation,
+        news_context=build_news_context(news),
+    )
+
+
+def build_fallback_insight(classification: ClassificationResult) -> str:
+    """Build a basic insight text without LLM.
+
+    Args:
+        classification: Resultado da análise técnica
+
+    Returns:
+        Texto neutro baseado apenas na classificação
+    """
+    return (
+        f"O par USD/BRL apresenta {classification.classification.value.lower()}. "
+        f"{classification.explanation}. "
+        "Consulte fontes especializadas para mais informações."
+    )
+
+
 async def generate_insight(
     classification: ClassificationResult,
     news: list[NewsItem] | None = None,
@@ -202,23 +245,8 @@ async def generate_insight(
     else:
         logger.info(f"📰 [INSIGHT] Using provided news: {len(news)} items")
 
-    # 2. Construir contexto de notícias
-    news_context = build_news_context(news)
-    logger.info("📰 [INSIGHT] News context built for prompt")
-
-    # 3. Construir prompt completo
-    prompt = INSIGHT_PROMPT.format(
-        classification=classification.classification.value,
-        confidence=classification.confidence,
-        current_price=classification.indicators.current_price,
-        sma20=classification.indicators.sma20,
-        sma50=classification.indicators.sma50,
-        rsi=classification.indicators.rsi,
-        bb_lower=classification.indicators.bollinger_lower,
-        bb_upper=classification.indicators.bollinger_upper,
-        explanation=classification.explanation,
-        news_context=news_context,
-    )
+    # 2-3. Construir prompt completo (classificação + contexto de notícias)
+    prompt = build_insight_prompt(classification, news)
 
     logger.info(f"📝 [INSIGHT] Prompt built: {len(prompt)} chars")
 
@@ -273,11 +301,7 @@ async def generate_insight(
 
         # Fallback: insight básico sem LLM
         return InsightResult(
-            text=(
-                f"O par USD/BRL apresenta {classification.classification.value.lower()}. "
-                f"{classification.explanation}. "
-                "Consulte fontes especializadas para mais informações."
-            ),
+            text=build_fallback_insight(classification),
             classification=classification.classification,
             news_sources=[],
             generated_at=datetime.utcnow(),
@@ -0,0 +1,85 @@
+"""Numba JIT kernels for technical indicator math.
+
+Numba is optional: when it is not installed NUMBA_AVAILABLE is False and
+callers fall back to the NumPy implementation in recommendation.py.
+"""
+
+import logging
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Try to import numba, fallback to NumPy path if not available
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    njit = None
+    NUMBA_AVAILABLE = False
+    logger.info("Numba not available. Using NumPy indicator path.")
+
+
+def _indicator_kernel(close: np.ndarray) -> tuple[float, float, float, float, float, float, float]:
+    """Trailing SMA20/SMA50, RSI(14) and Bollinger(20, 2) for the last bar.
+
+    Single pass over the last 50 closes for both SMAs, then a short pass
+    for the sample std (ddof=1) and one for the 14 RSI deltas. Semantics
+    match the NumPy path: NaN when history is shorter than the window,
+    NaN deltas count as zero, RSI falls back to 50/100.
+
+    Args:
+        close: 1-D float64 array of closes (oldest first)
+
+    Returns:
+        (current, sma20, sma50, rsi, bb_upper, bb_lower, bb_middle)
+    """
+    n = close.shape[0]
+    current = close[n - 1]
+
+    # SMA20 + SMA50 (fused)
+    sum20 = 0.0
+    sum50 = 0.0
+    for i in range(max(n - 50, 0), n):
+        sum50 += close[i]
+        if i >= n - 20:
+            sum20 += close[i]
+    sma20 = sum20 / 20 if n >= 20 else np.nan
+    sma50 = sum50 / 50 if n >= 50 else np.nan
+
+    # Bollinger std (two-pass for numerical stability)
+    bb_std = np.nan
+    if n >= 20:
+        sq = 0.0
+        for i in range(n - 20, n):
+            d = close[i] - sma20
+            sq += d * d
+        bb_std = np.sqrt(sq / 19)
+
+    # RSI (simple mean of last 14 gains/losses)
+    rsi = 50.0
+    if n > 14:
+        gain = 0.0
+        loss = 0.0
+        for i in range(n - 14, n):
+            d = close[i] - close[i - 1]
+            if d > 0:
+                gain += d
+            elif d < 0:
+                loss -= d
+        gain /= 14
+        loss /= 14
+        if loss == 0:
+            rsi = 100.0 if gain > 0 else 50.0
+        else:
+            rsi = 100 - (100 / (1 + gain / loss))
+
+    return current, sma20, sma50, rsi, sma20 + 2 * bb_std, sma20 - 2 * bb_std, sma20
+
+
+if NUMBA_AVAILABLE:
+    indicator_kernel = njit(cache=True)(_indicator_kernel)
+    # Compile at import so the first request pays no JIT cost
+    indicator_kernel(np.linspace(5.0, 6.0, 51))
+else:
+    indicator_kernel = None
@@ -4,6 +4,7 @@ Providers: Minimax → Vertex AI → Anthropic
 """
 
 import asyncio
+import json
 import logging
 import time
 from dataclasses import dataclass, field
@@ -82,6 +83,10 @@ class LLMProvider:
 _providers: list[LLMProvider] = []
 _initialized = False
 
+# In-flight non-streaming calls, keyed by request payload.
+# Concurrent identical requests share a single provider call.
+_inflight: dict[str, asyncio.Future] = {}
+
 
 def _sanitize_error(error: Exception) -> str:
     """Remove sensitive data from error messages."""
@@ -161,6 +166,10 @@ async def _call_provider(provider: LLMProvider, messages: list, max_tokens: int,
 async def call_llm(messages: list[dict[str, str]], stream: bool = False, max_tokens: int | None = None) -> Any:
     """Call LLM with automatic fallback.
 
+    Non-streaming calls with identical messages and max_tokens that arrive
+    while one is already in flight wait for that call instead of issuing a
+    new provider request.
+
     Args:
         messages: List of message dicts (role, content)
         stream: Whether to stream response
@@ -179,6 +188,25 @@ async def call_llm(messages: list[dict[str, str]], stream: bool = False, max_tok
         raise ValueError("Nenhum LLM configurado. Configure pelo menos MINIMAX_TOKEN no .env")
 
     tokens = max_tokens or settings.llm_max_tokens
+
+    if stream:
+        return await _call_with_fallback(messages, tokens, stream=True)
+
+    key = json.dumps([messages, tokens], sort_keys=True)
+    future = _inflight.get(key)
+    if future is None:
+        future = asyncio.ensure_future(_call_with_fallback(messages, tokens, stream=False))
+        _inflight[key] = future
+        future.add_done_callback(lambda _: _inflight.pop(key, None))
+    else:
+        logger.debug("Joining in-flight LLM call with identical payload")
+
+    # shield: a cancelled caller must not cancel the call shared with others
+    return await asyncio.shield(future)
+
+
+async def _call_with_fallback(messages: list[dict[str, str]], tokens: int, stream: bool) -> Any:
+    """Try each available provider in order until one succeeds."""
     last_error = None
     used_provider = None
 
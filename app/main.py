@@ -1,28 +1,37 @@
 """FastAPI application with Forex Advisor endpoints."""
 
+import dataclasses
 import logging
 import time
 from collections import defaultdict
+from collections.abc import AsyncGenerator
 from contextlib import asynccontextmanager
 
 import os
 from pathlib import Path
 
+import orjson
 from fastapi import FastAPI, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse, FileResponse
+from fastapi.responses import JSONResponse, FileResponse, Response, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from starlette.middleware.base import BaseHTTPMiddleware
 
 from .admin import router as admin_router, set_rag_instance
-from .cache import get_cache_status, get_cached, set_cached
+from .cache import get_cache_status, get_cached_bytes, set_cached_bytes
 from .chat import get_rag, router as chat_router
 from .config import settings
 from .docs_chat import router as docs_chat_router
-from .insights import generate_insight
-from .llm_router import get_router_stats
-from .models import InsightResponse, TechnicalResponse
-from .recommendation import get_classification
+from .insights import (
+    build_fallback_insight,
+    build_insight_prompt,
+    fetch_news,
+    generate_insight,
+    validate_insight,
+)
+from .llm_router import call_llm, get_router_stats
+from .models import ClassificationResult, InsightResponse, TechnicalResponse
+from .recommendation import close_yahoo_client, get_classification
 from .sandbox import close_sandbox, get_sandbox_status
 
 
@@ -106,6 +115,9 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         logger.warning(f"Não foi possível pre-carregar modelo RAG: {e}")
 
+    # Gerar o schema OpenAPI uma única vez (fica cacheado em app.openapi_schema)
+    app.openapi()
+
     yield
     # Shutdown
     logger.info("👋 Encerrando Forex Advisor API...")
@@ -118,6 +130,7 @@ async def lifespan(app: FastAPI):
         logger.warning(f"Erro ao fechar RAG: {e}")
 
     close_sandbox()  # Cleanup E2B sandbox
+    await close_yahoo_client()
 
 
 app = FastAPI(
@@ -127,6 +140,7 @@ app = FastAPI(
         "combinando análise técnica com notícias em tempo real.\n\n"
         "**Endpoints principais:**\n"
         "- `/api/v1/forex/usdbrl` - Análise completa com insight IA\n"
+        "- `/api/v1/forex/usdbrl/stream` - Insight IA via streaming (SSE)\n"
         "- `/api/v1/forex/usdbrl/technical` - Apenas análise técnica\n"
         "- `/health` - Status do serviço"
     ),
@@ -161,6 +175,27 @@ app.include_router(docs_chat_router)
 app.include_router(admin_router)
 
 
+def _serialize_classification(classification: ClassificationResult) -> dict:
+    """Build the technical part of the forex response payload.
+
+    Shared by the full and technical-only endpoints.
+
+    Args:
+        classification: Result from the recommendation engine
+
+    Returns:
+        JSON-serializable dict with classification and indicators
+    """
+    return {
+        "symbol": "USD/BRL",
+        "classification": classification.classification.value,
+        "confidence": classification.confidence,
+        "indicators": dataclasses.asdict(classification.indicators),
+        "explanation": classification.explanation,
+        "features_importance": dict(classification.features_importance),
+    }
+
+
 @app.get(
     "/api/v1/forex/usdbrl",
     response_model=InsightResponse,
@@ -198,19 +233,21 @@ async def get_usdbrl_insight(
     Returns:
         Resposta JSON com dados técnicos + insight gerado por IA
     """
-    cache_key = "forex:usdbrl:latest"
+    # v2: corpo JSON já serializado (bytes). Entradas antigas (dict com
+    # _cached_at e cached=false) ficam na chave sem sufixo e expiram pelo TTL.
+    cache_key = "forex:usdbrl:latest:v2"
 
     logger.info(f"🚀 [API] GET /api/v1/forex/usdbrl - force_refresh={force_refresh}")
 
     # 1. Tentar cache primeiro (a menos que force_refresh)
     if not force_refresh:
         logger.info("💾 [API] Checking cache...")
-        cached = await get_cached(cache_key)
+        cached = await get_cached_bytes(cache_key)
         if cached:
             logger.info("✅ [API] Cache HIT - Returning cached insight")
-            cached["cached"] = True
-            return JSONResponse(
+            return Response(
                 content=cached,
+                media_type="application/json",
                 headers={"X-Cache": "HIT"},
             )
         logger.info("💾 [API] Cache MISS - Will generate new insight")
@@ -234,32 +271,25 @@ async def get_usdbrl_insight(
         )
 
         # 4. Montar resposta
-        result = {
-            "symbol": "USD/BRL",
-            "classification": classification.classification.value,
-            "confidence": classification.confidence,
-            "indicators": {
-                "current_price": classification.indicators.current_price,
-                "sma20": classification.indicators.sma20,
-                "sma50": classification.indicators.sma50,
-                "rsi": classification.indicators.rsi,
-                "bollinger_upper": classification.indicators.bollinger_upper,
-                "bollinger_lower": classification.indicators.bollinger_lower,
-            },
-            "explanation": classification.explanation,
-            "features_importance": classification.features_importance,
-            "insight": insight.text,
-            "news_sources": insight.news_sources,
-            "generated_at": insight.generated_at.isoformat(),
-            "cached": False,
-        }
+        result = _serialize_classification(classification)
+        result.update(
+            insight=insight.text,
+            news_sources=insight.news_sources,
+            generated_at=insight.generated_at_iso,
+            cached=False,
+        )
 
-        # 5. Salvar no cache
+        # 5. Salvar no cache (já serializado, com cached=True para os HITs)
         logger.info(f"💾 [API] Saving to cache (TTL: {settings.cache_ttl_insight}s)...")
-        await set_cached(cache_key, result, ttl=settings.cache_ttl_insight)
+        await set_cached_bytes(
+            cache_key,
+            orjson.dumps({**result, "cached": True}),
+            ttl=settings.cache_ttl_insight,
+        )
 
-        return JSONResponse(
-            content=result,
+        return Response(
+            content=orjson.dumps(result),
+            media_type="application/json",
             headers={"X-Cache": "MISS"},
         )
 
@@ -271,6 +301,79 @@ async def get_usdbrl_insight(
         )
 
 
+@app.get(
+    "/api/v1/forex/usdbrl/stream",
+    summary="Análise completa USD/BRL (streaming)",
+    description=(
+        "Mesma análise de `/api/v1/forex/usdbrl`, mas o insight é enviado via "
+        "Server-Sent Events à medida que a IA gera o texto.\n\n"
+        "Eventos:\n"
+        "- `classification`: payload técnico (enviado primeiro)\n"
+        "- mensagens `data`: trechos do insight (`{\"content\": ...}`)\n"
+        "- `done`: fontes das notícias e validação de compliance\n"
+        "- `error`: falha na geração\n\n"
+        "Não usa cache."
+    ),
+    tags=["Forex"],
+)
+async def stream_usdbrl_insight():
+    """Stream the AI insight as it is generated (SSE).
+
+    The technical classification is computed up front and sent as the first
+    event; LLM chunks are forwarded without buffering. Compliance validation
+    runs on the full text at the end and, if it fails, the `done` event
+    carries a neutral `final_response` that replaces the streamed text.
+    """
+    try:
+        classification = await get_classification()
+        news = await fetch_news()
+    except Exception as e:
+        logger.error(f"Error preparing insight stream: {e}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"Erro ao gerar insight: {e!s}",
+        )
+
+    prompt = build_insight_prompt(classification, news)
+    news_sources = list({item.source for item in news[:5]})
+
+    async def event_generator() -> AsyncGenerator[str, None]:
+        technical = orjson.dumps(_serialize_classification(classification)).decode()
+        yield f"event: classification\ndata: {technical}\n\n"
+
+        full_response = ""
+        try:
+            response = await call_llm(
+                messages=[{"role": "user", "content": prompt}],
+                stream=True,
+            )
+            async for chunk in response:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    content = chunk.choices[0].delta.content
+                    full_response += content
+                    yield f"data: {orjson.dumps({'content': content}).decode()}\n\n"
+        except Exception as e:
+            logger.error(f"Error streaming insight: {e}")
+            error = {"message": str(e), "final_response": build_fallback_insight(classification)}
+            yield f"event: error\ndata: {orjson.dumps(error).decode()}\n\n"
+            return
+
+        done_data = {"news_sources": news_sources, "compliant": True}
+        if not validate_insight(full_response):
+            done_data["compliant"] = False
+            done_data["final_response"] = build_fallback_insight(classification)
+        yield f"event: done\ndata: {orjson.dumps(done_data).decode()}\n\n"
+
+    return StreamingResponse(
+        event_generator(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no",  # Disable nginx buffering
+        },
+    )
+
+
 @app.get(
     "/api/v1/forex/usdbrl/technical",
     response_model=TechnicalResponse,
@@ -292,40 +395,28 @@ async def get_technical_only(
     ),
 ):
     """Return only technical analysis without AI insight."""
-    cache_key = "forex:usdbrl:technical"
+    cache_key = "forex:usdbrl:technical:v2"  # v2: bytes (ver get_usdbrl_insight)
 
     # Try cache first
     if not force_refresh:
-        cached = await get_cached(cache_key)
+        cached = await get_cached_bytes(cache_key)
         if cached:
-            return JSONResponse(
+            return Response(
                 content=cached,
+                media_type="application/json",
                 headers={"X-Cache": "HIT"},
             )
 
     try:
         classification = await get_classification()
 
-        result = {
-            "symbol": "USD/BRL",
-            "classification": classification.classification.value,
-            "confidence": classification.confidence,
-            "indicators": {
-                "current_price": classification.indicators.current_price,
-                "sma20": classification.indicators.sma20,
-                "sma50": classification.indicators.sma50,
-                "rsi": classification.indicators.rsi,
-                "bollinger_upper": classification.indicators.bollinger_upper,
-                "bollinger_lower": classification.indicators.bollinger_lower,
-            },
-            "explanation": classification.explanation,
-            "features_importance": classification.features_importance,
-        }
+        body = orjson.dumps(_serialize_classification(classification))
 
-        await set_cached(cache_key, result, ttl=settings.cache_ttl_technical)
+        await set_cached_bytes(cache_key, body, ttl=settings.cache_ttl_technical)
 
-        return JSONResponse(
-            content=result,
+        return Response(
+            content=body,
+            media_type="application/json",
             headers={"X-Cache": "MISS"},
         )
 
@@ -428,5 +519,6 @@ else:
             "endpoints": {
                 "full_analysis": "/api/v1/forex/usdbrl",
                 "technical_only": "/api/v1/forex/usdbrl/technical",
+                "full_analysis_stream": "/api/v1/forex/usdbrl/stream",
             },
         }
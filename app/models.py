@@ -1,10 +1,11 @@
 """Data models and types for the API."""
 
+from collections.abc import Mapping
 from dataclasses import dataclass, field
 from datetime import datetime
 from enum import Enum
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 
 
 class MarketClassification(str, Enum):
@@ -16,7 +17,7 @@ class MarketClassification(str, Enum):
     NEUTRAL = "Neutro"
 
 
-@dataclass
+@dataclass(slots=True)
 class TechnicalIndicators:
     """Calculated technical indicators."""
 
@@ -33,7 +34,7 @@ class TechnicalIndicators:
     macd_signal: float
 
 
-@dataclass
+@dataclass(slots=True)
 class ClassificationResult:
     """Classification result with explainability."""
 
@@ -41,10 +42,10 @@ class ClassificationResult:
     confidence: float
     indicators: TechnicalIndicators
     explanation: str
-    features_importance: dict[str, float] = field(default_factory=dict)
+    features_importance: Mapping[str, float] = field(default_factory=dict)
 
 
-@dataclass
+@dataclass(slots=True)
 class NewsItem:
     """News item for context enrichment."""
 
@@ -55,7 +56,7 @@ class NewsItem:
     published_at: datetime
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class InsightResult:
     """Generated insight result."""
 
@@ -63,20 +64,31 @@ class InsightResult:
     classification: MarketClassification
     news_sources: list[str]
     generated_at: datetime
+    generated_at_iso: str = field(init=False)
+
+    def __post_init__(self):
+        # Formatado uma única vez, reaproveitado em cada resposta
+        object.__setattr__(self, "generated_at_iso", self.generated_at.isoformat())
 
 
 # Pydantic models for API responses
+#
+# Usados apenas para documentação (OpenAPI): os endpoints devolvem uma
+# Response já serializada, então o FastAPI não revalida o payload.
 
 
 class IndicatorsResponse(BaseModel):
     """Response model for technical indicators."""
 
+    model_config = ConfigDict(frozen=True)
+
     current_price: float = Field(..., description="Preço atual do ativo")
     sma20: float = Field(..., description="Média móvel simples de 20 períodos")
     sma50: float = Field(..., description="Média móvel simples de 50 períodos")
     rsi: float = Field(..., description="Índice de Força Relativa (14 períodos)")
     bollinger_upper: float = Field(..., description="Banda de Bollinger superior")
     bollinger_lower: float = Field(..., description="Banda de Bollinger inferior")
+    bollinger_middle: float = Field(..., description="Banda de Bollinger central (SMA20)")
     stochastic_k: float = Field(..., description="Stochastic %K (14 períodos)")
     stochastic_d: float = Field(..., description="Stochastic %D (média móvel de %K)")
     macd: float = Field(..., description="MACD (12, 26, 9)")
@@ -86,6 +98,8 @@ class IndicatorsResponse(BaseModel):
 class InsightResponse(BaseModel):
     """Full response model for main endpoint."""
 
+    model_config = ConfigDict(frozen=True)
+
     symbol: str = Field(..., description="Par de moedas")
     classification: str = Field(..., description="Classificação do mercado")
     confidence: float = Field(..., ge=0, le=1, description="Confiança da classificação")
@@ -103,6 +117,8 @@ class InsightResponse(BaseModel):
 class TechnicalResponse(BaseModel):
     """Response model for technical-only endpoint."""
 
+    model_config = ConfigDict(frozen=True)
+
     symbol: str = Field(..., description="Par de moedas")
     classification: str = Field(..., description="Classificação do mercado")
     confidence: float = Field(..., ge=0, le=1, description="Confiança da classificação")
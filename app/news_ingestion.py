@@ -9,12 +9,15 @@ Usage:
     python -m app.news_ingestion          # Ingest news
     python -m app.news_ingestion --stats  # Show stats
     python -m app.news_ingestion --clear  # Clear all data
+    python -m app.news_ingestion --migrate-int8  # Copy float32 vectors to int8
 """
 
 import asyncio
+import atexit
 import logging
 import sys
 from datetime import datetime
+from functools import lru_cache
 
 from .config import settings
 from .insights import fetch_news
@@ -27,6 +30,18 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
+@lru_cache(maxsize=1)
+def get_rag() -> SimpleRAG:
+    """Get RAG instance (singleton, closed at exit).
+
+    Returns:
+        SimpleRAG instance shared by the ingestion functions
+    """
+    rag = SimpleRAG(settings.rag_db_path, quantize=settings.rag_int8)
+    atexit.register(rag.close)
+    return rag
+
+
 async def ingest_news_to_rag(limit: int = 10) -> dict:
     """Fetch news and ingest into RAG.
 
@@ -36,33 +51,33 @@ async def ingest_news_to_rag(limit: int = 10) -> dict:
     Returns:
         Stats dict with ingested/duplicates/errors counts
     """
-    rag = SimpleRAG(settings.rag_db_path)
+    rag = get_rag()
     stats = {"fetched": 0, "ingested": 0, "duplicates": 0, "errors": 0}
 
     try:
         # Fetch news from RSS
         logger.info(f"Fetching news for query: '{settings.news_query}'")
-        news_items = await fetch_news(query=settings.news_query, limit=limit)
+        news_items = (await fetch_news())[:limit]
         stats["fetched"] = len(news_items)
 
-        # Ingest each news item
-        for item in news_items:
-            try:
-                # Combine title + description for better context
-                content = f"{item.title}. {item.description}"
-                source = item.source
+        # Ingest all items in one batch (single embedding run + transaction)
+        try:
+            # Combine title + description for better context
+            contents = [f"{item.title}. {item.description}" for item in news_items]
+            sources = [item.source for item in news_items]
 
-                doc_id = await rag.add_text(content, source=source)
+            doc_ids = await rag.add_texts(contents, sources)
 
+            for item, doc_id in zip(news_items, doc_ids):
                 if doc_id:
                     stats["ingested"] += 1
                     logger.debug(f"Ingested: {item.title[:50]}...")
                 else:
                     stats["duplicates"] += 1
 
-            except Exception as e:
-                stats["errors"] += 1
-                logger.warning(f"Error ingesting news: {e}")
+        except Exception as e:
+            stats["errors"] += 1
+            logger.warning(f"Error ingesting news: {e}")
 
         logger.info(
             f"Ingestion complete: {stats['ingested']} new, "
@@ -82,7 +97,7 @@ async def get_rag_stats() -> dict:
     Returns:
         Stats dict from RAG
     """
-    rag = SimpleRAG(settings.rag_db_path)
+    rag = get_rag()
     return rag.stats()
 
 
@@ -92,12 +107,25 @@ async def clear_rag() -> int:
     Returns:
         Number of documents removed
     """
-    rag = SimpleRAG(settings.rag_db_path)
+    rag = get_rag()
     count = await rag.clear()
     logger.info(f"Cleared {count} documents from RAG")
     return count
 
 
+async def migrate_rag_to_int8() -> int:
+    """Copy existing float32 embeddings into the int8 vector table.
+
+    Returns:
+        Number of vectors migrated
+    """
+    rag = SimpleRAG(settings.rag_db_path, quantize=True)
+    try:
+        return rag.migrate_to_int8()
+    finally:
+        rag.close()
+
+
 async def search_rag(query: str, top_k: int = 5) -> list:
     """Search RAG for testing.
 
@@ -108,7 +136,7 @@ async def search_rag(query: str, top_k: int = 5) -> list:
     Returns:
         List of search results
     """
-    rag = SimpleRAG(settings.rag_db_path)
+    rag = get_rag()
     results = await rag.search(query, top_k=top_k)
     return results
 
@@ -133,6 +161,11 @@ def main():
             else:
                 print("Cancelled")
 
+        elif cmd == "--migrate-int8":
+            count = asyncio.run(migrate_rag_to_int8())
+            print(f"✅ Migrated {count} embeddings to int8")
+            print("   Set RAG_INT8=true to search the int8 table")
+
         elif cmd == "--search":
             if len(sys.argv) > 2:
                 query = " ".join(sys.argv[2:])
@@ -151,6 +184,7 @@ def main():
             print("  python -m app.news_ingestion --stats  # Show stats")
             print("  python -m app.news_ingestion --search <query>  # Test search")
             print("  python -m app.news_ingestion --clear  # Clear all data")
+            print("  python -m app.news_ingestion --migrate-int8  # Copy vectors to int8")
 
     else:
         # Default: ingest news
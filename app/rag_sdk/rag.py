@@ -1,19 +1,149 @@
 """Simple RAG SDK - Ingest and Search."""
 
+import asyncio
 import hashlib
 import logging
+import queue
 import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable
+from concurrent.futures import Future
 from dataclasses import dataclass
+from functools import cache
 from pathlib import Path
 
+try:
+    import resource  # Unix apenas
+except ImportError:
+    resource = None
+
 import apsw
+import numpy as np
 import sqlite_vec
 from fastembed import TextEmbedding
 
 logger = logging.getLogger(__name__)
 
+# SQL reutilizado em toda chamada: texto idêntico = hit no cache de
+# statements preparados da conexão apsw (sem re-parse)
+# Usa o indice implicito do hash UNIQUE (sqlite_autoindex_documentos_1)
+SQL_HASH_EXISTS = "SELECT EXISTS(SELECT 1 FROM documentos WHERE hash = ?)"
+SQL_INSERT_DOC_RETURNING = (
+    "INSERT OR IGNORE INTO documentos (source, content, hash) VALUES (?, ?, ?) RETURNING id"
+)
+SQL_INSERT_DOCS_RETURNING = (
+    "INSERT OR IGNORE INTO documentos (source, content, hash) VALUES (?, ?, ?) RETURNING id, hash"
+)
+SQL_SELECT_HASHES = "SELECT hash FROM documentos WHERE hash IN ({placeholders})"
+SQL_COUNT_DOCS = "SELECT COUNT(*) FROM documentos"
+
+# SQL da tabela de vetores: float32 (vec_docs) ou int8 (vec_docs_int8),
+# ambas com distancia de cosseno
+VEC_TABLES = {
+    False: {
+        "create": """
+            CREATE VIRTUAL TABLE IF NOT EXISTS vec_docs USING vec0(
+                doc_id INTEGER PRIMARY KEY,
+                embedding FLOAT[384] distance_metric=cosine
+            )
+        """,
+        "insert": "INSERT INTO vec_docs (doc_id, embedding) VALUES (?, ?)",
+        "search": """
+            SELECT v.doc_id, v.distance, d.source, d.content
+            FROM vec_docs v
+            JOIN documentos d ON d.id = v.doc_id
+            WHERE v.embedding MATCH ? AND k = ?
+        """,
+        "count": "SELECT COUNT(*) FROM vec_docs",
+        "delete": "DELETE FROM vec_docs",
+    },
+    True: {
+        "create": """
+            CREATE VIRTUAL TABLE IF NOT EXISTS vec_docs_int8 USING vec0(
+                doc_id INTEGER PRIMARY KEY,
+                embedding int8[384] distance_metric=cosine
+            )
+        """,
+        "insert": "INSERT INTO vec_docs_int8 (doc_id, embedding) VALUES (?, vec_int8(?))",
+        "search": """
+            SELECT v.doc_id, v.distance, d.source, d.content
+            FROM vec_docs_int8 v
+            JOIN documentos d ON d.id = v.doc_id
+            WHERE v.embedding MATCH vec_int8(?) AND k = ?
+        """,
+        "count": "SELECT COUNT(*) FROM vec_docs_int8",
+        "delete": "DELETE FROM vec_docs_int8",
+    },
+}
+
+# Busca restrita a uma fonte: o filtro por doc_id entra no scan KNN do vec0
+# (menos distancias calculadas e top_k completo dentro da fonte)
+for _sql in VEC_TABLES.values():
+    _sql["search_source"] = (
+        _sql["search"].rstrip()
+        + " AND v.doc_id IN (SELECT id FROM documentos WHERE source = ?)"
+    )
+del _sql
+SQL_MIGRATE_INT8 = """
+    SELECT doc_id, embedding FROM vec_docs
+    WHERE doc_id NOT IN (SELECT doc_id FROM vec_docs_int8)
+"""
+
+# Versao do esquema de hash (PRAGMA user_version)
+# 0 = sha256[:16], 1 = blake2b(digest_size=8)
+HASH_SCHEMA_VERSION = 1
+
+# Tamanho do cache de statements preparados por conexão
+STATEMENT_CACHE_SIZE = 64
+
+# Textos por execução do modelo de embedding (EmbeddingWorker)
+EMBED_BATCH_SIZE = 32
+
+# Janela (s) para agrupar pedidos de embedding concorrentes em um lote
+EMBED_BATCH_WINDOW = 0.01
+
+# Cache LRU de embeddings de query (compartilhado entre instancias)
+QUERY_EMBED_CACHE_SIZE = 1024
+_query_embed_cache: OrderedDict[bytes, np.ndarray] = OrderedDict()
+_query_embed_lock = threading.Lock()
+_query_embed_stats = {"hits": 0, "misses": 0}
+
+# Cache de resultados por proximidade de query
+QUERY_RESULT_CACHE_SIZE = 256
+
+
+def normalize(embedding: np.ndarray) -> np.ndarray:
+    """Normaliza um embedding para norma 1 (float32)."""
+    embedding = np.asarray(embedding, dtype=np.float32)
+    return embedding / (np.linalg.norm(embedding) + 1e-12)
+
+
+def quantize_int8(embedding: np.ndarray) -> np.ndarray:
+    """Quantiza um embedding para int8 (escala pelo maior valor absoluto).
+
+    A escala por vetor nao altera a distancia de cosseno usada pela tabela
+    int8, entao cada vetor usa toda a faixa [-127, 127].
+    """
+    embedding = np.asarray(embedding, dtype=np.float32)
+    max_abs = float(np.abs(embedding).max())
+    if max_abs == 0:
+        return np.zeros(embedding.shape, dtype=np.int8)
+    return np.round(embedding * (127 / max_abs)).astype(np.int8)
+
+
+@cache
+def load_embedding_model(model_name: str) -> TextEmbedding:
+    """Carrega o modelo de embedding uma unica vez por processo.
 
-@dataclass
+    Todas as instancias de SimpleRAG (ingestao, chat, admin) compartilham
+    a mesma sessao ONNX em vez de carregar uma copia cada.
+    """
+    logger.info(f"Carregando modelo de embedding: {model_name}")
+    return TextEmbedding(model_name)
+
+
+@dataclass(slots=True)
 class SearchResult:
     """Resultado de busca."""
     doc_id: int
@@ -22,9 +152,175 @@ class SearchResult:
     similarity: float
 
 
+class EmbeddingWorker:
+    """Thread dedicada ao modelo de embedding, com micro-batching.
+
+    Textos enviados por varias corrotinas/threads dentro de uma janela de
+    EMBED_BATCH_WINDOW sao agrupados (ate batch_size) em uma unica chamada
+    model.embed, sempre na mesma thread. Use get_embedding_worker para
+    compartilhar um worker (e a sessao ONNX) por modelo no processo.
+    """
+
+    def __init__(
+        self,
+        get_model: Callable[[], TextEmbedding],
+        batch_size: int = EMBED_BATCH_SIZE,
+        window: float = EMBED_BATCH_WINDOW,
+    ):
+        self._get_model = get_model
+        self.batch_size = batch_size
+        self.window = window
+        self._queue: queue.Queue[tuple[str, Future] | None] = queue.Queue()
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+
+    def submit(self, texts: list[str]) -> list[Future]:
+        """Enfileira textos; cada Future recebe o embedding (np.ndarray)."""
+        self._ensure_started()
+        futures = []
+        for text in texts:
+            future: Future = Future()
+            self._queue.put((text, future))
+            futures.append(future)
+        return futures
+
+    async def embed(self, texts: list[str]) -> list[np.ndarray]:
+        """Gera embeddings na thread do worker sem bloquear o event loop."""
+        futures = self.submit(texts)
+        return list(await asyncio.gather(*(asyncio.wrap_future(f) for f in futures)))
+
+    def stop(self) -> None:
+        """Encerra a thread apos processar os pedidos ja enfileirados."""
+        with self._lock:
+            if self._thread is not None:
+                self._queue.put(None)
+                self._thread = None
+
+    def _ensure_started(self) -> None:
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(
+                        target=self._run, name="embedding-worker", daemon=True
+                    )
+                    self._thread.start()
+
+    def _run(self) -> None:
+        stopping = False
+        while not stopping:
+            item = self._queue.get()
+            if item is None:
+                return
+
+            # Agrupa o que chegar ate encher o lote ou fechar a janela
+            batch = [item]
+            deadline = time.monotonic() + self.window
+            while len(batch) < self.batch_size:
+                try:
+                    item = self._queue.get(timeout=max(deadline - time.monotonic(), 0))
+                except queue.Empty:
+                    break
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+
+            # Ignora pedidos cancelados pelo chamador
+            batch = [(t, f) for t, f in batch if f.set_running_or_notify_cancel()]
+            if not batch:
+                continue
+
+            try:
+                embeddings = list(self._get_model().embed(
+                    [text for text, _ in batch],
+                    batch_size=self.batch_size,
+                ))
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+
+            for (_, future), embedding in zip(batch, embeddings):
+                future.set_result(embedding)
+
+
+@cache
+def get_embedding_worker(model_name: str) -> EmbeddingWorker:
+    """Worker de embeddings unico por modelo no processo.
+
+    Todas as instancias de SimpleRAG enviam textos para a mesma thread,
+    entao a sessao ONNX compartilhada e usada por uma thread so.
+    """
+    return EmbeddingWorker(lambda: load_embedding_model(model_name))
+
+
+class QueryCache:
+    """Cache de resultados de busca servido por queries semanticamente proximas.
+
+    Guarda ate max_entries embeddings de query (empilhados em uma matriz
+    (N, 384)) com seus resultados. Uma nova query reaproveita os resultados
+    se o cosseno com alguma query cacheada for >= threshold e o top_k
+    cacheado cobrir o pedido. Eviccao LRU.
+    """
+
+    def __init__(self, threshold: float, max_entries: int = QUERY_RESULT_CACHE_SIZE, dim: int = 384):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self._vecs = np.zeros((max_entries, dim), dtype=np.float32)
+        self._entries: list[tuple[int, list[SearchResult]]] = []
+        self._last_used = np.zeros(max_entries, dtype=np.int64)
+        self._tick = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, query_vec: np.ndarray, top_k: int) -> list["SearchResult"] | None:
+        """Retorna resultados cacheados para uma query proxima, ou None."""
+        with self._lock:
+            n = len(self._entries)
+            if n:
+                sims = self._vecs[:n] @ query_vec
+                best = int(np.argmax(sims))
+                cached_k, results = self._entries[best]
+                if sims[best] >= self.threshold and cached_k >= top_k:
+                    self._tick += 1
+                    self._last_used[best] = self._tick
+                    self.hits += 1
+                    return results[:top_k]
+            self.misses += 1
+            return None
+
+    def put(self, query_vec: np.ndarray, top_k: int, results: list["SearchResult"]) -> None:
+        """Adiciona resultados, removendo a entrada menos usada se cheio."""
+        with self._lock:
+            n = len(self._entries)
+            if n < self.max_entries:
+                slot = n
+                self._entries.append((top_k, results))
+            else:
+                slot = int(np.argmin(self._last_used))
+                self._entries[slot] = (top_k, results)
+            self._vecs[slot] = query_vec
+            self._tick += 1
+            self._last_used[slot] = self._tick
+
+    def clear(self) -> None:
+        """Invalida todas as entradas (o indice mudou)."""
+        with self._lock:
+            self._entries.clear()
+
+
 class SimpleRAG:
     """RAG simplificado: ingest + search.
 
+    Com quantize=True os vetores ficam em int8 (4x menos bytes por linha)
+    na tabela vec_docs_int8, com distancia de cosseno.
+
+    Com query_cache_threshold definido, buscas com query de cosseno >= o
+    limiar em relacao a uma busca anterior reaproveitam seus resultados
+    (QueryCache). O cache e invalidado quando o indice muda, inclusive
+    por outra conexao (PRAGMA data_version).
+
     Exemplo:
         >>> rag = SimpleRAG("rag.db")
         >>> await rag.add_text("Dolar sobe com tensoes", source="news")
@@ -33,18 +329,28 @@ class SimpleRAG:
 
     EMBEDDING_MODEL = "BAAI/bge-small-en-v1.5"
 
-    def __init__(self, db_path: str = "rag.db"):
+    def __init__(
+        self,
+        db_path: str = "rag.db",
+        quantize: bool = False,
+        query_cache_threshold: float | None = None,
+    ):
         self.db_path = Path(db_path)
+        self.quantize = quantize
+        self._vec_sql = VEC_TABLES[quantize]
+        self._result_cache = QueryCache(query_cache_threshold) if query_cache_threshold else None
+        self._data_version: int | None = None
         self._model: TextEmbedding | None = None
         self._conn: apsw.Connection | None = None
         self._lock = threading.Lock()
+        self._embedder = get_embedding_worker(self.EMBEDDING_MODEL)
         self._ensure_database()
 
     @property
     def model(self) -> TextEmbedding:
         """Lazy load do modelo de embedding."""
         if self._model is None:
-            self._model = TextEmbedding(self.EMBEDDING_MODEL)
+            self._model = load_embedding_model(self.EMBEDDING_MODEL)
         return self._model
 
     def preload_model(self) -> None:
@@ -58,18 +364,28 @@ class SimpleRAG:
         if self._conn is None:
             with self._lock:
                 if self._conn is None:
-                    self._conn = apsw.Connection(str(self.db_path))
+                    self._conn = apsw.Connection(
+                        str(self.db_path),
+                        statementcachesize=STATEMENT_CACHE_SIZE,
+                    )
                     self._conn.enableloadextension(True)
                     self._conn.loadextension(sqlite_vec.loadable_path())
                     self._conn.enableloadextension(False)
                     # Enable WAL mode for better concurrency
                     self._conn.cursor().execute("PRAGMA journal_mode=WAL")
                     self._conn.cursor().execute("PRAGMA synchronous=NORMAL")
+                    # Leitura via mmap (256MB), cache de paginas (64MB) e
+                    # temporários em memória
+                    self._conn.cursor().execute("PRAGMA mmap_size=268435456")
+                    self._conn.cursor().execute("PRAGMA cache_size=-65536")
+                    self._conn.cursor().execute("PRAGMA temp_store=MEMORY")
+                    # Espera o lock de escrita (ex: ingestao em paralelo)
+                    self._conn.cursor().execute("PRAGMA busy_timeout=5000")
                     logger.debug(f"Conexão SQLite criada: {self.db_path}")
         return self._conn
 
     def close(self) -> None:
-        """Fecha a conexão persistente."""
+        """Fecha a conexão persistente (o worker de embeddings e compartilhado)."""
         if self._conn is not None:
             with self._lock:
                 if self._conn is not None:
@@ -92,18 +408,113 @@ class SimpleRAG:
                 created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
             )
         """)
+        cursor.execute(
+            "CREATE INDEX IF NOT EXISTS idx_documentos_source ON documentos(source)"
+        )
 
         # Tabela de vetores (384 dims para bge-small)
-        cursor.execute("""
-            CREATE VIRTUAL TABLE IF NOT EXISTS vec_docs USING vec0(
-                doc_id INTEGER PRIMARY KEY,
-                embedding FLOAT[384]
-            )
-        """)
+        cursor.execute(self._vec_sql["create"])
+
+        self._migrate_hashes()
+        self._migrate_vec_metric()
+
+    def _migrate_hashes(self) -> None:
+        """Recalcula hashes de bancos criados com o esquema antigo (sha256)."""
+        conn = self._get_connection()
+        cursor = conn.cursor()
+
+        version = cursor.execute("PRAGMA user_version").fetchone()[0]
+        if version >= HASH_SCHEMA_VERSION:
+            return
+
+        rows = [
+            (self._compute_hash(content), doc_id)
+            for doc_id, content in cursor.execute("SELECT id, content FROM documentos")
+        ]
+        with conn:
+            cursor.executemany("UPDATE documentos SET hash = ? WHERE id = ?", rows)
+            cursor.execute(f"PRAGMA user_version = {HASH_SCHEMA_VERSION}")
+        if rows:
+            logger.info(f"Hashes de {len(rows)} documentos migrados para blake2b")
+
+    def _migrate_vec_metric(self) -> None:
+        """Recria vec_docs com distancia de cosseno (bancos antigos usam L2)."""
+        if self.quantize:
+            return
+
+        conn = self._get_connection()
+        cursor = conn.cursor()
+
+        row = cursor.execute(
+            "SELECT sql FROM sqlite_master WHERE name = 'vec_docs'"
+        ).fetchone()
+        if row is None or "distance_metric=cosine" in row[0]:
+            return
+
+        rows = [
+            (doc_id, self._serialize_embedding(np.frombuffer(blob, dtype=np.float32)))
+            for doc_id, blob in cursor.execute("SELECT doc_id, embedding FROM vec_docs")
+        ]
+        with conn:
+            cursor.execute("DROP TABLE vec_docs")
+            cursor.execute(self._vec_sql["create"])
+            cursor.executemany(self._vec_sql["insert"], rows)
+        logger.info(f"vec_docs recriada com distancia de cosseno ({len(rows)} vetores)")
+
+    def _serialize_embedding(self, embedding: np.ndarray) -> bytes:
+        """Serializa embedding (normalizado) no formato da tabela de vetores."""
+        if self.quantize:
+            return quantize_int8(embedding).tobytes()
+        # Mesmo layout de sqlite_vec.serialize_float32, sem passar por list
+        return normalize(embedding).tobytes()
+
+    async def _embed_query(self, query: str) -> np.ndarray:
+        """Embedding da query, com cache LRU por texto normalizado.
+
+        Queries repetidas (ex: settings.news_query) evitam uma inferencia
+        ONNX completa.
+        """
+        text = query.strip().lower()
+        key = hashlib.blake2b(text.encode(), digest_size=16).digest()
+
+        with _query_embed_lock:
+            embedding = _query_embed_cache.get(key)
+            if embedding is not None:
+                _query_embed_cache.move_to_end(key)
+                _query_embed_stats["hits"] += 1
+                return embedding
+            _query_embed_stats["misses"] += 1
+
+        embedding = normalize((await self._embedder.embed([text]))[0])
+        embedding.flags.writeable = False
+
+        with _query_embed_lock:
+            _query_embed_cache[key] = embedding
+            if len(_query_embed_cache) > QUERY_EMBED_CACHE_SIZE:
+                _query_embed_cache.popitem(last=False)
+
+        return embedding
+
+    def _check_result_cache(self) -> None:
+        """Invalida o cache de resultados se outra conexao alterou o banco."""
+        conn = self._get_connection()
+        version = conn.cursor().execute("PRAGMA data_version").fetchone()[0]
+        if version != self._data_version:
+            self._data_version = version
+            self._result_cache.clear()
+
+    def _invalidate_result_cache(self) -> None:
+        """Invalida o cache de resultados apos escrita nesta conexao."""
+        if self._result_cache is not None:
+            self._result_cache.clear()
+
+    def _distance_to_similarity(self, distance: float) -> float:
+        """Converte distancia de cosseno em similaridade de cosseno (>= 0)."""
+        return max(0.0, 1 - distance)
 
     def _compute_hash(self, content: str) -> str:
-        """Hash para deduplicacao."""
-        return hashlib.sha256(content.encode()).hexdigest()[:16]
+        """Hash para deduplicacao (nao criptografico, 16 hex chars)."""
+        return hashlib.blake2b(content.encode(), digest_size=8).hexdigest()
 
     async def add_text(self, content: str, source: str = "unknown") -> int | None:
         """Adiciona texto ao indice.
@@ -120,55 +531,137 @@ class SimpleRAG:
 
         conn = self._get_connection()
         cursor = conn.cursor()
-
-        # Verifica duplicado
         content_hash = self._compute_hash(content)
-        for row in cursor.execute("SELECT id FROM documentos WHERE hash = ?", (content_hash,)):
-            return None  # Ja existe
 
-        # Insere documento
-        cursor.execute(
-            "INSERT INTO documentos (source, content, hash) VALUES (?, ?, ?)",
-            (source, content, content_hash)
-        )
-        doc_id = conn.last_insert_rowid()
+        # Duplicado nao chega ao modelo de embedding
+        if cursor.execute(SQL_HASH_EXISTS, (content_hash,)).fetchone()[0]:
+            return None
 
-        # Gera e insere embedding
-        embeddings = list(self.model.embed([content]))
-        embedding_bytes = sqlite_vec.serialize_float32(embeddings[0].tolist())
-        cursor.execute(
-            "INSERT INTO vec_docs (doc_id, embedding) VALUES (?, ?)",
-            (doc_id, embedding_bytes)
-        )
+        # Embedding fora da transacao (await no worker)
+        embeddings = await self._embedder.embed([content])
+        embedding_bytes = self._serialize_embedding(embeddings[0])
+
+        with conn:
+            # Duplicado inserido em paralelo (hash UNIQUE) nao retorna linha
+            rows = list(cursor.execute(SQL_INSERT_DOC_RETURNING, (source, content, content_hash)))
+            if not rows:
+                return None  # Ja existe
+            doc_id = rows[0][0]
+            cursor.execute(self._vec_sql["insert"], (doc_id, embedding_bytes))
+        self._invalidate_result_cache()
 
         return doc_id
 
-    async def search(self, query: str, top_k: int = 5) -> list[SearchResult]:
+    async def add_texts(self, contents: list[str], sources: list[str]) -> list[int | None]:
+        """Adiciona varios textos ao indice em lote.
+
+        Deduplica com uma unica consulta, gera os embeddings em lotes de
+        EMBED_BATCH_SIZE e insere tudo em uma unica transacao (executemany,
+        um unico commit no WAL).
+
+        Args:
+            contents: Textos para indexar
+            sources: Identificador da fonte de cada texto
+
+        Returns:
+            doc_id (ou None se vazio/duplicado) na mesma ordem de contents
+        """
+        results: list[int | None] = [None] * len(contents)
+
+        # Hash de cada texto (duplicados dentro do lote ficam com o primeiro)
+        pending: dict[str, int] = {}
+        for i, content in enumerate(contents):
+            if content.strip():
+                pending.setdefault(self._compute_hash(content), i)
+
+        if not pending:
+            return results
+
+        conn = self._get_connection()
+        cursor = conn.cursor()
+
+        # Verifica duplicados ja indexados
+        sql = SQL_SELECT_HASHES.format(placeholders=",".join("?" * len(pending)))
+        existing = {row[0] for row in cursor.execute(sql, tuple(pending))}
+        new = [(h, i) for h, i in pending.items() if h not in existing]
+
+        if not new:
+            return results
+
+        # Gera embeddings em lote no worker (fora da transacao)
+        embeddings = await self._embedder.embed([contents[i] for _, i in new])
+
+        embedding_by_hash = {
+            content_hash: self._serialize_embedding(embedding)
+            for (content_hash, _), embedding in zip(new, embeddings)
+        }
+
+        with conn:
+            # RETURNING so traz as linhas inseridas (duplicados concorrentes
+            # sao ignorados pelo hash UNIQUE)
+            inserted = list(cursor.executemany(
+                SQL_INSERT_DOCS_RETURNING,
+                [(sources[i], contents[i], content_hash) for content_hash, i in new],
+            ))
+            cursor.executemany(
+                self._vec_sql["insert"],
+                [(doc_id, embedding_by_hash[content_hash]) for doc_id, content_hash in inserted],
+            )
+        self._invalidate_result_cache()
+
+        for doc_id, content_hash in inserted:
+            results[pending[content_hash]] = doc_id
+
+        return results
+
+    async def search(
+        self,
+        query: str,
+        top_k: int = 5,
+        source_filter: str | None = None,
+    ) -> list[SearchResult]:
         """Busca semantica.
 
         Args:
             query: Texto de busca
             top_k: Numero de resultados
+            source_filter: Restringe a busca a documentos desta fonte
 
         Returns:
             Lista de SearchResult
         """
-        # Gera embedding da query
-        embeddings = list(self.model.embed([query]))
-        query_vec = sqlite_vec.serialize_float32(embeddings[0].tolist())
+        # Gera embedding da query (ou reaproveita do cache)
+        embedding = await self._embed_query(query)
+
+        if source_filter:
+            return self._search_vec(
+                self._vec_sql["search_source"], embedding, (top_k, source_filter)
+            )
+
+        if self._result_cache is not None:
+            self._check_result_cache()
+            cached = self._result_cache.get(embedding, top_k)
+            if cached is not None:
+                return cached
+
+        results = self._search_vec(self._vec_sql["search"], embedding, (top_k,))
+
+        if self._result_cache is not None:
+            self._result_cache.put(embedding, top_k, results)
+
+        return results
+
+    def _search_vec(self, sql: str, embedding: np.ndarray, params: tuple) -> list[SearchResult]:
+        """Executa a busca KNN (sql recebe o vetor seguido de params)."""
+        query_vec = self._serialize_embedding(embedding)
 
         conn = self._get_connection()
         cursor = conn.cursor()
 
         results = []
-        for row in cursor.execute("""
-            SELECT v.doc_id, v.distance, d.source, d.content
-            FROM vec_docs v
-            JOIN documentos d ON d.id = v.doc_id
-            WHERE v.embedding MATCH ? AND k = ?
-        """, (query_vec, top_k)):
+        for row in cursor.execute(sql, (query_vec, *params)):
             doc_id, distance, source, content = row
-            similarity = max(0, 1 - distance)
+            similarity = self._distance_to_similarity(distance)
 
             results.append(SearchResult(
                 doc_id=doc_id,
@@ -188,23 +681,55 @@ class SimpleRAG:
         conn = self._get_connection()
         cursor = conn.cursor()
 
-        cursor.execute("SELECT COUNT(*) FROM documentos")
+        cursor.execute(SQL_COUNT_DOCS)
         count = cursor.fetchone()[0]
 
-        cursor.execute("DELETE FROM vec_docs")
+        cursor.execute(self._vec_sql["delete"])
         cursor.execute("DELETE FROM documentos")
+        self._invalidate_result_cache()
 
         return count
 
+    def migrate_to_int8(self) -> int:
+        """Copia os vetores float32 (vec_docs) para a tabela int8.
+
+        Apenas documentos ainda ausentes em vec_docs_int8 sao migrados.
+
+        Returns:
+            Numero de vetores migrados
+        """
+        conn = self._get_connection()
+        cursor = conn.cursor()
+
+        has_float_table = cursor.execute(
+            "SELECT 1 FROM sqlite_master WHERE name = 'vec_docs'"
+        ).fetchone()
+        if not has_float_table:
+            return 0
+
+        int8_sql = VEC_TABLES[True]
+        cursor.execute(int8_sql["create"])
+
+        rows = [
+            (doc_id, quantize_int8(np.frombuffer(blob, dtype=np.float32)).tobytes())
+            for doc_id, blob in cursor.execute(SQL_MIGRATE_INT8)
+        ]
+        with conn:
+            cursor.executemany(int8_sql["insert"], rows)
+        self._invalidate_result_cache()
+
+        logger.info(f"Migrados {len(rows)} vetores para int8")
+        return len(rows)
+
     def stats(self) -> dict:
         """Estatisticas do indice."""
         conn = self._get_connection()
         cursor = conn.cursor()
 
-        cursor.execute("SELECT COUNT(*) FROM documentos")
+        cursor.execute(SQL_COUNT_DOCS)
         total_docs = cursor.fetchone()[0]
 
-        cursor.execute("SELECT COUNT(*) FROM vec_docs")
+        cursor.execute(self._vec_sql["count"])
         total_vecs = cursor.fetchone()[0]
 
         return {
@@ -221,10 +746,10 @@ class SimpleRAG:
         cursor = conn.cursor()
 
         # Contagens básicas
-        cursor.execute("SELECT COUNT(*) FROM documentos")
+        cursor.execute(SQL_COUNT_DOCS)
         total_docs = cursor.fetchone()[0]
 
-        cursor.execute("SELECT COUNT(*) FROM vec_docs")
+        cursor.execute(self._vec_sql["count"])
         total_vecs = cursor.fetchone()[0]
 
         # Contagem por fonte
@@ -261,4 +786,21 @@ class SimpleRAG:
             "sources": sources,
             "recent_docs": recent_docs,
             "embedding_model": self.EMBEDDING_MODEL,
+            # O worker compartilhado carrega o modelo sem passar por self._model
+            "embedding_model_loaded": load_embedding_model.cache_info().currsize > 0,
+            "embedding_dtype": "int8" if self.quantize else "float32",
+            # Pico de memoria do processo, inclui a sessao ONNX (ru_maxrss em KB no Linux)
+            "process_max_rss_mb": (
+                round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+                if resource is not None else None
+            ),
+            "query_cache": {
+                **_query_embed_stats,
+                "size": len(_query_embed_cache),
+            },
+            "result_cache": {
+                "hits": self._result_cache.hits,
+                "misses": self._result_cache.misses,
+                "threshold": self._result_cache.threshold,
+            } if self._result_cache is not None else None,
         }
@@ -1,38 +1,256 @@
 """Recommendation engine with technical analysis and explainability."""
 
 import asyncio
-from concurrent.futures import ThreadPoolExecutor
+import time
+from collections import OrderedDict
+from types import MappingProxyType
 
+import httpx
 import numpy as np
-import pandas as pd
-import yfinance as yf
+from numpy.lib.stride_tricks import sliding_window_view
 
 from .config import settings
+from .kernels import NUMBA_AVAILABLE, indicator_kernel
 from .models import ClassificationResult, MarketClassification, TechnicalIndicators
 
-# Thread pool for blocking yfinance operations
-_executor = ThreadPoolExecutor(max_workers=2)
+# Yahoo Finance chart API (the JSON yfinance itself downloads)
+YAHOO_CHART_URL = "https://query2.finance.yahoo.com/v8/finance/chart/{symbol}"
+YAHOO_HEADERS = {"User-Agent": "Mozilla/5.0 (compatible; forex-advisor)"}
+
+_yahoo_client: httpx.AsyncClient | None = None
+
+# OHLC bars as structure-of-arrays: timestamp (int64 epoch seconds) and
+# open/high/low/close/volume (contiguous float64), oldest first
+OHLC = dict[str, np.ndarray]
+
+OHLC_COLUMNS = ("open", "high", "low", "close", "volume")
+
+# (symbol, period) -> (time.monotonic() of the fetch, bars)
+_ohlc_cache: dict[tuple[str, str], tuple[float, OHLC]] = {}
+# (symbol, period) -> download in progress, awaited by every concurrent miss
+_ohlc_inflight: dict[tuple[str, str], asyncio.Task] = {}
+
+# Weight of each feature in the classification decision (read-only, shared
+# by every ClassificationResult)
+FEATURES_IMPORTANCE = MappingProxyType({
+    "price_vs_sma50": 0.40,
+    "rsi_signal": 0.35,
+    "bb_position": 0.25,
+})
+
+# Final classification per (symbol, period, first/last bar timestamp, last
+# close). Indicators and classify are deterministic in the bars, so a result
+# only changes when a bar closes or Yahoo revises the current one intraday
+# (hence the close in the key). LRU, bounded.
+CLASSIFICATION_CACHE_SIZE = 64
+_classification_cache: OrderedDict[tuple, ClassificationResult] = OrderedDict()
+
+
+def _get_yahoo_client() -> httpx.AsyncClient:
+    """Shared keepalive client for Yahoo Finance (created lazily)."""
+    global _yahoo_client
+
+    if _yahoo_client is None:
+        _yahoo_client = httpx.AsyncClient(
+            http2=True,
+            headers=YAHOO_HEADERS,
+            limits=httpx.Limits(max_keepalive_connections=4),
+            timeout=10.0,
+        )
+    return _yahoo_client
+
+
+async def close_yahoo_client() -> None:
+    """Close the shared Yahoo Finance client."""
+    global _yahoo_client
+
+    if _yahoo_client is not None:
+        await _yahoo_client.aclose()
+        _yahoo_client = None
+
+
+def _parse_chart(payload: dict) -> OHLC:
+    """Build OHLC arrays from a Yahoo chart API response.
+
+    Bars without a close (holidays, the still-empty current bar) are dropped.
+    Returns an empty dict when the response has no bars.
+    """
+    result = (payload.get("chart") or {}).get("result") or []
+    if not result or not result[0].get("timestamp"):
+        return {}
+
+    quote = result[0]["indicators"]["quote"][0]
+    timestamp = np.asarray(result[0]["timestamp"], dtype=np.int64)
+    columns = {
+        column: np.asarray(quote.get(column, ()), dtype=np.float64)
+        for column in OHLC_COLUMNS
+    }
+
+    valid = np.isfinite(columns["close"])
+    ohlc = {"timestamp": timestamp[valid]}
+    for column, values in columns.items():
+        ohlc[column] = np.ascontiguousarray(values[valid])
+    return ohlc
+
+
+def _get_cached_ohlc(key: tuple[str, str]) -> OHLC | None:
+    """Return cached bars for `key` if younger than settings.cache_ttl_ohlc."""
+    cached = _ohlc_cache.get(key)
+    if cached is not None and time.monotonic() - cached[0] < settings.cache_ttl_ohlc:
+        return cached[1]
+    return None
+
+
+def clear_ohlc_cache() -> None:
+    """Drop all cached OHLC responses (next fetch goes to Yahoo)."""
+    _ohlc_cache.clear()
+
+
+async def _download_ohlc(symbol: str, period: str) -> OHLC:
+    """Download bars from Yahoo and store them in the OHLC cache."""
+    try:
+        response = await _get_yahoo_client().get(
+            YAHOO_CHART_URL.format(symbol=symbol),
+            params={"range": period, "interval": "1d"},
+        )
+        response.raise_for_status()
+        ohlc = _parse_chart(response.json())
+    except (httpx.HTTPError, ValueError, KeyError, IndexError) as e:
+        raise ValueError(f"Could not fetch data for {symbol}") from e
 
+    if not ohlc or not len(ohlc["close"]):
+        raise ValueError(f"Could not fetch data for {symbol}")
 
-async def fetch_ohlc() -> pd.DataFrame:
-    """Fetch OHLC data via yfinance.
+    _ohlc_cache[(symbol, period)] = (time.monotonic(), ohlc)
+    return ohlc
+
+
+async def fetch_ohlc(symbol: str | None = None, period: str | None = None) -> OHLC:
+    """Fetch daily OHLC data from the Yahoo Finance chart API.
+
+    Responses are cached in-process per (symbol, period) for
+    settings.cache_ttl_ohlc seconds. Concurrent misses for the same key
+    await one in-flight download (single-flight) and share its result or
+    its error.
+
+    Args:
+        symbol: Yahoo symbol (default: settings.symbol)
+        period: Range such as "5y" (default: settings.period)
 
     Returns:
-        DataFrame with Open, High, Low, Close, Volume columns
+        Dict of NumPy arrays: timestamp, open, high, low, close, volume
+
+    Raises:
+        ValueError: If no data could be fetched
     """
-    loop = asyncio.get_event_loop()
-    df = await loop.run_in_executor(
-        _executor,
-        lambda: yf.download(settings.symbol, period=settings.period, progress=False),
-    )
+    symbol = symbol or settings.symbol
+    period = period or settings.period
+    key = (symbol, period)
+
+    cached = _get_cached_ohlc(key)
+    if cached is not None:
+        return cached
+
+    task = _ohlc_inflight.get(key)
+    if task is None:
+        task = asyncio.ensure_future(_download_ohlc(symbol, period))
+        _ohlc_inflight[key] = task
+        task.add_done_callback(lambda _: _ohlc_inflight.pop(key, None))
+
+    # shield: a cancelled caller must not cancel the download for the others
+    return await asyncio.shield(task)
+
+
+def _tail_mean(values: np.ndarray, window: int) -> float:
+    """Mean of the last `window` values (NaN if history is too short)."""
+    if len(values) < window:
+        return np.nan
+    return float(values[-window:].mean())
+
+
+def _tail_std(values: np.ndarray, window: int) -> float:
+    """Sample std (ddof=1, like pandas) of the last `window` values."""
+    if len(values) < window:
+        return np.nan
+    return float(values[-window:].std(ddof=1))
+
+
+def _rsi(close: np.ndarray, window: int = 14) -> float:
+    """RSI from the simple mean of the last `window` gains/losses."""
+    if len(close) <= window:
+        return 50.0
 
-    if df.empty:
-        raise ValueError(f"Could not fetch data for {settings.symbol}")
+    delta = np.diff(close[-(window + 1):])
+    gain = float(np.where(delta > 0, delta, 0.0).mean())
+    loss = float(np.where(delta < 0, -delta, 0.0).mean())
 
-    return df
+    if not np.isfinite(gain) or not np.isfinite(loss):
+        return 50.0
+    if loss == 0:
+        return 100.0 if gain > 0 else 50.0
+    return 100 - (100 / (1 + gain / loss))
 
 
-def calculate_indicators(df: pd.DataFrame) -> TechnicalIndicators:
+def _ewm_mean(values: np.ndarray, span: int) -> np.ndarray:
+    """Exponential moving average matching pandas ``ewm(span=span).mean()``.
+
+    Uses pandas' default adjusted weights, computed with cumulative sums.
+    Long inputs are split into blocks short enough that decay**-k stays
+    below ~1e150 (one block for a few years of daily bars).
+    """
+    decay = 1 - 2 / (span + 1)
+    log_decay = np.log(decay)
+    block = max(int(345 / -log_decay), 1)
+    out = np.empty(len(values), dtype=np.float64)
+    num = den = 0.0
+
+    for start in range(0, len(values), block):
+        chunk = values[start:start + block]
+        power = np.exp(np.arange(len(chunk)) * log_decay)
+        inverse = 1 / power
+        # sum_{i<=j} decay^(j-i) * x_i for the chunk alone
+        chunk_num = power * np.cumsum(chunk * inverse)
+        chunk_den = power * np.cumsum(inverse)
+        # Previous blocks decay by decay^(j+1)
+        carry = power * decay
+        out[start:start + len(chunk)] = (num * carry + chunk_num) / (den * carry + chunk_den)
+        num = num * carry[-1] + chunk_num[-1]
+        den = den * carry[-1] + chunk_den[-1]
+
+    return out
+
+
+def _stochastic(
+    close: np.ndarray,
+    low: np.ndarray,
+    high: np.ndarray,
+    window: int = 14,
+    smooth: int = 3,
+) -> tuple[float, float]:
+    """Stochastic %K and %D for the last bar (50.0 when undefined)."""
+    tail = min(len(close), window + smooth - 1)
+    if tail < window:
+        return 50.0, 50.0
+
+    low_n = sliding_window_view(low[-tail:], window).min(axis=1)
+    high_n = sliding_window_view(high[-tail:], window).max(axis=1)
+    denominator = high_n - low_n
+    with np.errstate(divide="ignore", invalid="ignore"):
+        k_percent = np.where(
+            denominator != 0,
+            100 * (close[-len(low_n):] - low_n) / denominator,
+            np.nan,
+        )
+
+    stochastic_k = float(k_percent[-1])
+    stochastic_d = float(k_percent.mean()) if len(k_percent) == smooth else np.nan
+    return (
+        stochastic_k if np.isfinite(stochastic_k) else 50.0,
+        stochastic_d if np.isfinite(stochastic_d) else 50.0,
+    )
+
+
+def calculate_indicators(ohlc: OHLC) -> TechnicalIndicators:
     """Calculate technical indicators from OHLC data.
 
     Indicators:
@@ -40,68 +258,50 @@ def calculate_indicators(df: pd.DataFrame) -> TechnicalIndicators:
     - RSI 14 periods
     - Bollinger Bands (SMA20 ± 2σ)
 
+    Only the values for the last bar are needed, so window-based indicators
+    are computed on NumPy tail slices instead of full rolling series.
+
     Args:
-        df: DataFrame with OHLC data
+        ohlc: OHLC arrays (see fetch_ohlc)
 
     Returns:
         TechnicalIndicators with all calculated values
     """
-    close = df["Close"].squeeze().reset_index(drop=True)
-
-    # Current price (last close)
-    current_price = float(close.iloc[-1])
-
-    # SMA - Simple Moving Averages
-    sma20 = float(close.rolling(window=20).mean().iloc[-1])
-    sma50 = float(close.rolling(window=50).mean().iloc[-1])
-
-    # RSI - Relative Strength Index (14 periods)
-    delta = close.diff()
-    gain = delta.where(delta > 0, 0).rolling(window=14).mean()
-    loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
-    rs = gain / loss.replace(0, np.nan)
-    rsi_series = 100 - (100 / (1 + rs))
-    rsi_last = float(rsi_series.iloc[-1])
-    if not np.isfinite(rsi_last):
-        gain_last = float(gain.iloc[-1])
-        loss_last = float(loss.iloc[-1])
-        if not np.isfinite(gain_last) or not np.isfinite(loss_last):
-            rsi_last = 50.0
-        elif loss_last == 0 and gain_last == 0:
-            rsi_last = 50.0
-        elif loss_last == 0:
-            rsi_last = 100.0
-        else:
-            rsi_last = 50.0
-    rsi = rsi_last
-
-    # Bollinger Bands (SMA20 ± 2 standard deviations)
-    bb_middle = sma20
-    bb_std = float(close.rolling(window=20).std().iloc[-1])
-    bb_upper = bb_middle + (2 * bb_std)
-    bb_lower = bb_middle - (2 * bb_std)
+    close = np.ascontiguousarray(ohlc["close"], dtype=np.float64)
+    low = np.ascontiguousarray(ohlc["low"], dtype=np.float64)
+    high = np.ascontiguousarray(ohlc["high"], dtype=np.float64)
+
+    if NUMBA_AVAILABLE:
+        # Price, SMAs, RSI and Bollinger in a single JIT-compiled pass
+        (
+            current_price, sma20, sma50, rsi, bb_upper, bb_lower, bb_middle,
+        ) = indicator_kernel(close)
+    else:
+        # Current price (last close)
+        current_price = float(close[-1])
+
+        # SMA - Simple Moving Averages
+        sma20 = _tail_mean(close, 20)
+        sma50 = _tail_mean(close, 50)
+
+        # RSI - Relative Strength Index (14 periods)
+        rsi = _rsi(close, 14)
+
+        # Bollinger Bands (SMA20 ± 2 standard deviations)
+        bb_middle = sma20
+        bb_std = _tail_std(close, 20)
+        bb_upper = bb_middle + (2 * bb_std)
+        bb_lower = bb_middle - (2 * bb_std)
 
     # Stochastic Oscillator (14, 3, 3)
-    low = df["Low"].squeeze().reset_index(drop=True)
-    high = df["High"].squeeze().reset_index(drop=True)
-    low_14 = low.rolling(window=14).min()
-    high_14 = high.rolling(window=14).max()
-    denominator = high_14 - low_14
-    k_percent = 100 * ((close - low_14) / denominator.replace(0, np.nan))
-    stochastic_k_raw = k_percent.iloc[-1]
-    stochastic_k = float(stochastic_k_raw) if pd.notna(stochastic_k_raw) else 50.0
-    stochastic_d_raw = k_percent.rolling(window=3).mean().iloc[-1]
-    stochastic_d = float(stochastic_d_raw) if pd.notna(stochastic_d_raw) else 50.0
-
-    # MACD (12, 26, 9)
-    ema_12 = close.ewm(span=12).mean()
-    ema_26 = close.ewm(span=26).mean()
-    macd_line = ema_12 - ema_26
-    macd_signal_line = macd_line.ewm(span=9).mean()
-    macd_raw = macd_line.iloc[-1]
-    macd = float(macd_raw) if pd.notna(macd_raw) else 0.0
-    macd_signal_raw = macd_signal_line.iloc[-1]
-    macd_signal = float(macd_signal_raw) if pd.notna(macd_signal_raw) else 0.0
+    stochastic_k, stochastic_d = _stochastic(close, low, high)
+
+    # MACD (12, 26, 9) - EMAs depend on the whole history
+    macd_line = _ewm_mean(close, 12) - _ewm_mean(close, 26)
+    macd = float(macd_line[-1])
+    macd_signal = float(_ewm_mean(macd_line, 9)[-1])
+    macd = macd if np.isfinite(macd) else 0.0
+    macd_signal = macd_signal if np.isfinite(macd_signal) else 0.0
 
     return TechnicalIndicators(
         current_price=round(current_price, 4),
@@ -133,24 +333,15 @@ def classify(indicators: TechnicalIndicators) -> ClassificationResult:
     Returns:
         ClassificationResult with classification and explainability
     """
-    # Calculate normalized features
-    features = {}
-
     # Feature 1: Position relative to SMA50 (%)
     price_vs_sma50 = (indicators.current_price - indicators.sma50) / indicators.sma50
-    features["price_vs_sma50"] = round(price_vs_sma50, 4)
-
-    # Feature 2: RSI normalized (-1 to 1)
-    rsi_normalized = (indicators.rsi - 50) / 50
-    features["rsi_signal"] = round(rsi_normalized, 4)
 
-    # Feature 3: Position in Bollinger Bands (0 to 1, can exceed)
+    # Feature 2: Position in Bollinger Bands (0 to 1, can exceed)
     bb_range = indicators.bollinger_upper - indicators.bollinger_lower
     if bb_range == 0:
         bb_position = 0.5
     else:
         bb_position = (indicators.current_price - indicators.bollinger_lower) / bb_range
-    features["bb_position"] = round(bb_position, 4)
 
     # Rule-based decision (transparent and auditable)
     if bb_position > 1.0 or bb_position < 0.0:
@@ -186,28 +377,102 @@ def classify(indicators: TechnicalIndicators) -> ClassificationResult:
         )
         confidence = 0.5
 
-    # Feature importance (weight of each feature in decision)
-    features_importance = {
-        "price_vs_sma50": 0.40,
-        "rsi_signal": 0.35,
-        "bb_position": 0.25,
-    }
-
     return ClassificationResult(
         classification=classification,
         confidence=round(confidence, 2),
         indicators=indicators,
         explanation=explanation,
-        features_importance=features_importance,
+        features_importance=FEATURES_IMPORTANCE,
     )
 
 
+# Label order for the indices returned by classify_batch
+CLASSIFICATION_ORDER = (
+    MarketClassification.HIGH_VOLATILITY,
+    MarketClassification.BULLISH,
+    MarketClassification.BEARISH,
+    MarketClassification.NEUTRAL,
+)
+
+
+def classify_batch(
+    current_price: np.ndarray,
+    sma50: np.ndarray,
+    rsi: np.ndarray,
+    bollinger_upper: np.ndarray,
+    bollinger_lower: np.ndarray,
+) -> tuple[np.ndarray, np.ndarray, dict[str, np.ndarray]]:
+    """Branchless version of classify() for many symbols at once.
+
+    Applies the same rules as classify() with masked NumPy arithmetic.
+    Explanations are not built here; use classify() for a single result.
+
+    Args:
+        current_price: Last price per symbol
+        sma50: SMA50 per symbol
+        rsi: RSI per symbol
+        bollinger_upper: Upper Bollinger band per symbol
+        bollinger_lower: Lower Bollinger band per symbol
+
+    Returns:
+        Tuple of (indices into CLASSIFICATION_ORDER, confidence, features)
+    """
+    price = np.asarray(current_price, dtype=np.float64)
+    sma50 = np.asarray(sma50, dtype=np.float64)
+    rsi = np.asarray(rsi, dtype=np.float64)
+    bb_range = np.asarray(bollinger_upper, dtype=np.float64) - bollinger_lower
+
+    price_vs_sma50 = (price - sma50) / sma50
+    rsi_normalized = (rsi - 50) / 50
+    with np.errstate(divide="ignore", invalid="ignore"):
+        bb_position = np.where(bb_range == 0, 0.5, (price - bollinger_lower) / bb_range)
+
+    conditions = [
+        (bb_position > 1.0) | (bb_position < 0.0),
+        (price_vs_sma50 > 0.02) & (rsi > 50) & (rsi < 70),
+        (price_vs_sma50 < -0.02) & (rsi > 30) & (rsi < 50),
+    ]
+    labels = np.select(conditions, [0, 1, 2], default=3)
+    confidence = np.select(
+        conditions,
+        [
+            np.minimum(np.abs(bb_position - 0.5) * 2, 1.0),
+            np.minimum(price_vs_sma50 * 10 + (rsi - 50) / 40, 1.0),
+            np.minimum(np.abs(price_vs_sma50) * 10 + (50 - rsi) / 40, 1.0),
+        ],
+        default=0.5,
+    )
+
+    features = {
+        "price_vs_sma50": np.round(price_vs_sma50, 4),
+        "rsi_signal": np.round(rsi_normalized, 4),
+        "bb_position": np.round(bb_position, 4),
+    }
+    return labels, np.round(confidence, 2), features
+
+
 async def get_classification() -> ClassificationResult:
     """Full pipeline: fetch data, calculate indicators and classify.
 
     Returns:
         ClassificationResult with full analysis
     """
-    df = await fetch_ohlc()
-    indicators = calculate_indicators(df)
-    return classify(indicators)
+    ohlc = await fetch_ohlc()
+    key = (
+        settings.symbol,
+        settings.period,
+        int(ohlc["timestamp"][0]),
+        int(ohlc["timestamp"][-1]),
+        float(ohlc["close"][-1]),
+    )
+
+    result = _classification_cache.get(key)
+    if result is not None:
+        _classification_cache.move_to_end(key)
+        return result
+
+    result = classify(calculate_indicators(ohlc))
+    _classification_cache[key] = result
+    if len(_classification_cache) > CLASSIFICATION_CACHE_SIZE:
+        _classification_cache.popitem(last=False)
+    return result
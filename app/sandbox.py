@@ -6,42 +6,45 @@ Executa código de análise em ambiente isolado para proteção contra:
 - Manipulação de recomendações via código injetado
 """
 
+import asyncio
+import base64
 import logging
 import os
 from typing import Any
 
+import orjson
+
 from .config import settings
 
 logger = logging.getLogger(__name__)
 
-# Singleton sandbox instance
-_sandbox = None
+# Pool de sandboxes: criados sob demanda até settings.e2b_pool_size e
+# devolvidos à fila após cada execução
+_pool: asyncio.Queue | None = None
+_sandboxes: list = []  # Todos os sandboxes vivos (status e cleanup)
+_creating = 0  # Criações em andamento (não ultrapassar o tamanho do pool)
+_waiting = 0  # Chamadas aguardando um sandbox livre na fila
 
 
-def _get_sandbox():
-    """Get or create E2B Sandbox singleton.
+def _create_sandbox():
+    """Create a new E2B Sandbox (the caller registers it in the pool).
 
     Returns:
         Sandbox instance, or None if E2B not configured
     """
-    global _sandbox
-
     if not settings.e2b_api_key:
         logger.debug("E2B não configurado (E2B_API_KEY ausente)")
         return None
 
-    if _sandbox is not None:
-        return _sandbox
-
     try:
         # Import apenas quando necessário (E2B pode não estar instalado)
         from e2b_code_interpreter import Sandbox
 
         os.environ.setdefault("E2B_API_KEY", settings.e2b_api_key)
 
-        _sandbox = Sandbox.create(timeout=settings.e2b_timeout)
+        sandbox = Sandbox.create(timeout=settings.e2b_timeout)
         logger.info(f"E2B Sandbox criado (timeout={settings.e2b_timeout}s)")
-        return _sandbox
+        return sandbox
 
     except ImportError:
         logger.warning("e2b-code-interpreter não instalado")
@@ -51,8 +54,90 @@ def _get_sandbox():
         return None
 
 
-def execute_analysis_code(code: str, data: dict[str, Any] | None = None) -> dict[str, Any]:
-    """Execute analysis code in isolated E2B sandbox.
+def _get_pool() -> asyncio.Queue:
+    """Queue of idle sandboxes (created lazily)."""
+    global _pool
+
+    if _pool is None:
+        _pool = asyncio.Queue()
+    return _pool
+
+
+async def _acquire_sandbox():
+    """Check out an idle sandbox, creating one while the pool is not full.
+
+    Waits at most settings.e2b_acquire_timeout seconds for a sandbox to be
+    released. A None in the queue is a wake-up left by _discard_sandbox:
+    a slot freed up, so the waiter goes back to creating a replacement.
+
+    Returns:
+        Sandbox instance, or None if none could be created or released in time
+    """
+    global _creating, _waiting
+
+    pool = _get_pool()
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + settings.e2b_acquire_timeout
+
+    while True:
+        if pool.empty() and len(_sandboxes) + _creating < settings.e2b_pool_size:
+            _creating += 1
+            try:
+                sandbox = await asyncio.to_thread(_create_sandbox)
+            finally:
+                _creating -= 1
+            if sandbox is not None:
+                _sandboxes.append(sandbox)
+                return sandbox
+            if not _sandboxes:
+                # Nada para aguardar: E2B indisponível
+                return None
+
+        remaining = deadline - loop.time()
+        if remaining <= 0:
+            logger.warning("Nenhum sandbox livre dentro do timeout")
+            return None
+
+        _waiting += 1
+        try:
+            sandbox = await asyncio.wait_for(pool.get(), timeout=remaining)
+        except TimeoutError:
+            logger.warning("Nenhum sandbox livre dentro do timeout")
+            return None
+        finally:
+            _waiting -= 1
+        if sandbox is not None:
+            return sandbox
+
+
+def _release_sandbox(sandbox) -> None:
+    """Return a healthy sandbox to the pool."""
+    _get_pool().put_nowait(sandbox)
+
+
+def _discard_sandbox(sandbox) -> None:
+    """Drop a dead sandbox from the pool and wake a waiter to replace it."""
+    if sandbox in _sandboxes:
+        _sandboxes.remove(sandbox)
+    try:
+        sandbox.close()
+    except Exception as e:
+        logger.warning(f"Erro ao fechar sandbox descartado: {e}")
+    if _waiting:
+        _get_pool().put_nowait(None)
+
+
+def _is_expired_error(error: Exception) -> bool:
+    """Whether the sandbox behind `error` is gone (timed out or killed)."""
+    message = str(error).lower()
+    return "not found" in message or "502" in message
+
+
+async def execute_analysis_code(code: str, data: dict[str, Any] | None = None) -> dict[str, Any]:
+    """Execute analysis code in an isolated E2B sandbox from the pool.
+
+    Concurrent calls run on different sandboxes (up to
+    settings.e2b_pool_size); the blocking E2B call runs in a worker thread.
 
     Args:
         code: Python code to execute (analysis/calculations only)
@@ -64,8 +149,7 @@ def execute_analysis_code(code: str, data: dict[str, Any] | None = None) -> dict
     Raises:
         ValueError: If E2B not configured
     """
-    global _sandbox
-    sandbox = _get_sandbox()
+    sandbox = await _acquire_sandbox()
 
     if sandbox is None:
         raise ValueError(
@@ -81,16 +165,19 @@ def execute_analysis_code(code: str, data: dict[str, Any] | None = None) -> dict
 
         # Executar no sandbox isolado
         try:
-            result = sandbox.run_code(full_code)
+            result = await asyncio.to_thread(sandbox.run_code, full_code)
         except Exception as e:
-            # Se sandbox expirou, recriar e tentar novamente
-            if "not found" in str(e).lower() or "502" in str(e):
+            # Se sandbox expirou, substituir e tentar novamente
+            if _is_expired_error(e):
                 logger.warning("Sandbox expirado, recriando...")
-                _sandbox = None
-                sandbox = _get_sandbox()
+                _discard_sandbox(sandbox)
+                # Se a espera abaixo for cancelada, o finally não devolve o
+                # sandbox descartado ao pool
+                sandbox = None
+                sandbox = await _acquire_sandbox()
                 if sandbox is None:
                     raise ValueError("Não foi possível recriar o sandbox")
-                result = sandbox.run_code(full_code)
+                result = await asyncio.to_thread(sandbox.run_code, full_code)
             else:
                 raise
 
@@ -120,6 +207,9 @@ def execute_analysis_code(code: str, data: dict[str, Any] | None = None) -> dict
 
     except Exception as e:
         logger.error(f"Erro na execução do sandbox: {e}")
+        if sandbox is not None and _is_expired_error(e):
+            _discard_sandbox(sandbox)
+            sandbox = None
         return {
             "result": None,
             "output": "",
@@ -127,6 +217,10 @@ def execute_analysis_code(code: str, data: dict[str, Any] | None = None) -> dict
             "sandbox_id": None,
         }
 
+    finally:
+        if sandbox is not None:
+            _release_sandbox(sandbox)
+
 
 def _prepare_code(code: str, data: dict[str, Any] | None) -> str:
     """Prepare code with injected data.
@@ -142,10 +236,8 @@ def _prepare_code(code: str, data: dict[str, Any] | None) -> str:
         return code
 
     # Serializar dados usando base64 para evitar injection
-    import base64
-    import json
-
-    json_bytes = json.dumps(data, default=str).encode('utf-8')
+    # (orjson já gera bytes UTF-8, sem cópia intermediária em str)
+    json_bytes = orjson.dumps(data, default=str, option=orjson.OPT_SERIALIZE_NUMPY)
     b64_data = base64.b64encode(json_bytes).decode('ascii')
 
     data_setup = f"""import json
@@ -167,21 +259,24 @@ if 'ohlc_data' in _injected_data:
 
 
 def close_sandbox() -> None:
-    """Close and cleanup sandbox instance."""
-    global _sandbox
+    """Close and cleanup every sandbox in the pool."""
+    global _pool
 
-    if _sandbox is not None:
+    for sandbox in _sandboxes:
         try:
-            _sandbox.close()
+            sandbox.close()
             logger.info("E2B Sandbox fechado")
         except Exception as e:
             logger.warning(f"Erro ao fechar sandbox: {e}")
-        finally:
-            _sandbox = None
+    _sandboxes.clear()
+    _pool = None
 
 
 def get_sandbox_status() -> dict[str, Any]:
-    """Get sandbox status for health checks.
+    """Get sandbox pool status for health checks.
+
+    Only reads the pool state: sandboxes are created on demand by
+    _acquire_sandbox, which keeps the count within settings.e2b_pool_size.
 
     Returns:
         Dict with status information
@@ -189,13 +284,12 @@ def get_sandbox_status() -> dict[str, Any]:
     if not settings.e2b_api_key:
         return {"status": "disabled", "reason": "no_api_key"}
 
-    sandbox = _get_sandbox()
-
-    if sandbox is None:
-        return {"status": "error", "reason": "failed_to_create"}
-
     return {
-        "status": "active",
-        "sandbox_id": sandbox.sandbox_id,
+        "status": "active" if _sandboxes else "ready",
+        "sandbox_id": _sandboxes[0].sandbox_id if _sandboxes else None,
+        "pool_size": settings.e2b_pool_size,
+        "sandboxes": len(_sandboxes),
+        "creating": _creating,
+        "idle": _get_pool().qsize(),
         "timeout": settings.e2b_timeout,
     }
@@ -1,11 +1,18 @@
 """Pytest configuration and fixtures."""
 
-import pytest
+import os
 
 
-@pytest.fixture(autouse=True)
-def set_test_env(monkeypatch):
-    """Set environment variables for testing."""
+def pytest_configure(config):
+    """Set test environment variables (before app import) and register markers."""
     # Use test Redis (can be mocked if needed)
-    monkeypatch.setenv("REDIS_URL", "redis://localhost:6379/1")  # Use DB 1 for tests
-    monkeypatch.setenv("DEBUG", "false")
+    os.environ["REDIS_URL"] = "redis://localhost:6379/1"  # Use DB 1 for tests
+    os.environ["DEBUG"] = "false"
+
+    # Seleção rápida: pytest -m "not embedding and not slow"
+    config.addinivalue_line(
+        "markers", "embedding: uses the real embedding model (downloads/loads ONNX)"
+    )
+    config.addinivalue_line(
+        "markers", "slow: calls external services (Yahoo Finance, LLM providers)"
+    )
@@ -1,15 +1,27 @@
 """Tests for FastAPI endpoints."""
 
+from datetime import datetime
+from types import SimpleNamespace
+
+import orjson
 import pytest
 from fastapi.testclient import TestClient
 
-from app.main import app
+from app.main import _serialize_classification, app
+from app.models import (
+    ClassificationResult,
+    InsightResult,
+    MarketClassification,
+    NewsItem,
+    TechnicalIndicators,
+)
 
 
-@pytest.fixture
+@pytest.fixture(scope="module")
 def client():
-    """Create test client."""
-    return TestClient(app)
+    """Create test client shared by the module (lifespan runs once)."""
+    with TestClient(app) as test_client:
+        yield test_client
 
 
 class TestHealthEndpoint:
@@ -61,6 +73,7 @@ class TestDocsEndpoint:
         assert "paths" in data
 
 
+@pytest.mark.slow
 class TestForexEndpoint:
     """Tests for forex analysis endpoint."""
 
@@ -120,6 +133,7 @@ class TestForexEndpoint:
         assert len(data["insight"]) > 20
 
 
+@pytest.mark.slow
 class TestTechnicalEndpoint:
     """Tests for technical-only endpoint."""
 
@@ -147,6 +161,7 @@ class TestTechnicalEndpoint:
         assert response.status_code == 200
 
 
+@pytest.mark.slow
 class TestCacheHeaders:
     """Tests for cache behavior."""
 
@@ -164,3 +179,171 @@ class TestCacheHeaders:
         # If cached field exists, verify it
         if "cached" in data:
             assert data["cached"] is True
+
+
+class TestSerializeClassification:
+    """Tests for the shared response payload helper."""
+
+    def test_includes_all_indicators(self):
+        """Should serialize every indicator field of the dataclass."""
+        indicators = TechnicalIndicators(
+            current_price=5.30,
+            sma20=5.29,
+            sma50=5.28,
+            rsi=50.0,
+            bollinger_upper=5.50,
+            bollinger_lower=5.10,
+            bollinger_middle=5.30,
+            stochastic_k=50.0,
+            stochastic_d=50.0,
+            macd=0.0,
+            macd_signal=0.0,
+        )
+        classification = ClassificationResult(
+            classification=MarketClassification.NEUTRAL,
+            confidence=0.5,
+            indicators=indicators,
+            explanation="Sem tendência clara.",
+            features_importance={"price_vs_sma50": 0.40},
+        )
+
+        data = _serialize_classification(classification)
+
+        assert data["symbol"] == "USD/BRL"
+        assert data["classification"] == "Neutro"
+        assert data["indicators"]["current_price"] == 5.30
+        assert data["indicators"]["macd_signal"] == 0.0
+        assert data["features_importance"] == {"price_vs_sma50": 0.40}
+
+
+def _neutral_classification() -> ClassificationResult:
+    """Neutral classification with fixed indicators for mocked endpoints."""
+    return ClassificationResult(
+        classification=MarketClassification.NEUTRAL,
+        confidence=0.5,
+        indicators=TechnicalIndicators(
+            current_price=5.30,
+            sma20=5.29,
+            sma50=5.28,
+            rsi=50.0,
+            bollinger_upper=5.50,
+            bollinger_lower=5.10,
+            bollinger_middle=5.30,
+            stochastic_k=50.0,
+            stochastic_d=50.0,
+            macd=0.0,
+            macd_signal=0.0,
+        ),
+        explanation="Sem tendência clara.",
+    )
+
+
+class TestInsightCache:
+    """Tests for the cached insight body (classification and LLM mocked)."""
+
+    @pytest.fixture
+    def redis_store(self, monkeypatch):
+        """Empty caches and a dict standing in for Redis."""
+        store: dict[str, str] = {}
+
+        class FakeRedis:
+            async def get(self, key):
+                return store.get(key)
+
+            async def setex(self, key, ttl, value):
+                store[key] = value.decode()
+
+        async def get_redis():
+            return FakeRedis()
+
+        async def fake_classification():
+            return _neutral_classification()
+
+        async def fake_insight(classification):
+            return InsightResult(
+                classification=classification,
+                text="O dólar segue estável.",
+                news_sources=["G1"],
+                generated_at=datetime(2024, 1, 1, 12, 0),
+            )
+
+        monkeypatch.setattr("app.cache.get_redis", get_redis)
+        monkeypatch.setattr("app.cache._memory_bytes_cache", {})
+        monkeypatch.setattr("app.cache._local_cache", {})
+        monkeypatch.setattr("app.main.get_classification", fake_classification)
+        monkeypatch.setattr("app.main.generate_insight", fake_insight)
+        return store
+
+    def test_hit_serves_stored_cached_true_body(self, client, redis_store):
+        """MISS answers cached=false; the stored body (and HITs) say cached=true."""
+        miss = client.get("/api/v1/forex/usdbrl")
+        assert miss.headers["X-Cache"] == "MISS"
+        assert miss.json()["cached"] is False
+
+        (stored,) = redis_store.values()
+        assert orjson.loads(stored)["cached"] is True
+
+        hit = client.get("/api/v1/forex/usdbrl")
+        assert hit.headers["X-Cache"] == "HIT"
+        assert hit.json() == {**miss.json(), "cached": True}
+
+    def test_ignores_legacy_dict_entries(self, client, redis_store):
+        """Entries written by set_cached (old key format) are not served."""
+        legacy = {"classification": "Neutro", "cached": False, "_cached_at": "x"}
+        redis_store["forex:usdbrl:latest"] = orjson.dumps(legacy).decode()
+
+        response = client.get("/api/v1/forex/usdbrl")
+
+        assert response.headers["X-Cache"] == "MISS"
+        assert "_cached_at" not in response.json()
+        assert response.json()["insight"] == "O dólar segue estável."
+
+
+class TestStreamEndpoint:
+    """Tests for the SSE insight endpoint (LLM and data sources mocked)."""
+
+    @pytest.fixture
+    def mock_pipeline(self, monkeypatch):
+        """Mock classification, news and a streaming LLM response."""
+        classification = _neutral_classification()
+        chunks = ["O dólar ", "segue ", "estável."]
+
+        async def fake_classification():
+            return classification
+
+        async def fake_news():
+            return [NewsItem("Título", "Descrição", "G1", "https://g1.globo.com", None)]
+
+        async def fake_call_llm(messages, stream=False, max_tokens=None):
+            async def generator():
+                for content in chunks:
+                    delta = SimpleNamespace(content=content)
+                    yield SimpleNamespace(choices=[SimpleNamespace(delta=delta)])
+            return generator()
+
+        monkeypatch.setattr("app.main.get_classification", fake_classification)
+        monkeypatch.setattr("app.main.fetch_news", fake_news)
+        monkeypatch.setattr("app.main.call_llm", fake_call_llm)
+        return chunks
+
+    def test_streams_chunks_as_sse(self, client, mock_pipeline):
+        """Should send classification, each chunk and a done event."""
+        response = client.get("/api/v1/forex/usdbrl/stream")
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/event-stream")
+        body = response.text
+        assert body.startswith("event: classification")
+        for content in mock_pipeline:
+            assert content in body
+        assert "event: done" in body
+        assert '"compliant":true' in body
+
+    def test_non_compliant_insight_is_replaced(self, client, mock_pipeline):
+        """Should flag recommendations and send a neutral final_response."""
+        mock_pipeline.append(" Recomendo comprar agora.")
+
+        response = client.get("/api/v1/forex/usdbrl/stream")
+
+        assert '"compliant":false' in response.text
+        assert "final_response" in response.text
@@ -0,0 +1,160 @@
+"""Tests for the cache layer (Redis replaced by an in-memory fake)."""
+
+import pytest
+
+from app import cache
+from app.cache import (
+    clear_forex_cache,
+    delete_cached,
+    get_cached_bytes,
+    set_cached_bytes,
+)
+
+
+class FakeRedis:
+    """Subset of redis.asyncio.Redis used by app.cache (decode_responses=True)."""
+
+    def __init__(self):
+        self.store: dict[str, str] = {}
+        self.gets = 0
+
+    async def get(self, key):
+        self.gets += 1
+        return self.store.get(key)
+
+    async def setex(self, key, ttl, value):
+        self.store[key] = value.decode() if isinstance(value, bytes) else value
+
+    async def delete(self, *keys):
+        return sum(self.store.pop(k, None) is not None for k in keys)
+
+    async def keys(self, pattern):
+        prefix = pattern.rstrip("*")
+        return [k for k in self.store if k.startswith(prefix)]
+
+
+@pytest.fixture(autouse=True)
+def _fresh_cache(monkeypatch):
+    """Isolated cache dicts and no Redis unless a test plugs one in."""
+    monkeypatch.setattr(cache, "_memory_cache", {})
+    monkeypatch.setattr(cache, "_memory_bytes_cache", {})
+    monkeypatch.setattr(cache, "_local_cache", {})
+    monkeypatch.setattr(cache, "_redis_client", None)
+    monkeypatch.setattr(cache, "REDIS_AVAILABLE", False)
+
+
+@pytest.fixture
+def fake_redis(monkeypatch):
+    """Plug a FakeRedis in as the Redis client."""
+    client = FakeRedis()
+
+    async def get_redis():
+        return client
+
+    monkeypatch.setattr(cache, "get_redis", get_redis)
+    return client
+
+
+class TestCachedBytes:
+    """Tests for get_cached_bytes/set_cached_bytes."""
+
+    async def test_roundtrip_memory(self):
+        """Without Redis, bytes come back unchanged from memory."""
+        body = b'{"classification":"Neutro","cached":true}'
+
+        assert await set_cached_bytes("forex:test", body, ttl=60)
+        assert await get_cached_bytes("forex:test") == body
+
+    async def test_miss_returns_none(self):
+        """Unknown keys should be a MISS."""
+        assert await get_cached_bytes("forex:missing") is None
+
+    async def test_redis_str_is_returned_as_bytes(self, fake_redis):
+        """Redis (decode_responses=True) returns str; callers get bytes."""
+        fake_redis.store["forex:test"] = '{"rsi":50.0}'
+
+        assert await get_cached_bytes("forex:test") == b'{"rsi":50.0}'
+
+    async def test_memory_entry_expires(self, monkeypatch):
+        """Expired memory entries are dropped."""
+        await set_cached_bytes("forex:test", b"{}", ttl=60)
+        cache._local_cache.clear()
+        value, expires_at = cache._memory_bytes_cache["forex:test"]
+        cache._memory_bytes_cache["forex:test"] = (value, expires_at - 120)
+
+        assert await get_cached_bytes("forex:test") is None
+        assert "forex:test" not in cache._memory_bytes_cache
+
+    async def test_delete_and_clear(self):
+        """delete_cached and clear_forex_cache drop bytes entries."""
+        await set_cached_bytes("forex:a", b"{}", ttl=60)
+        await set_cached_bytes("forex:b", b"{}", ttl=60)
+
+        await delete_cached("forex:a")
+        assert await get_cached_bytes("forex:a") is None
+
+        assert await clear_forex_cache() == 1
+        assert await get_cached_bytes("forex:b") is None
+
+
+class TestLocalCache:
+    """Tests for the short-lived in-process layer in front of Redis."""
+
+    @pytest.fixture
+    def clock(self, monkeypatch):
+        """Controllable time.time() for app.cache."""
+        now = [1_000.0]
+        monkeypatch.setattr(cache.time, "time", lambda: now[0])
+        return now
+
+    async def test_redis_hit_is_served_locally(self, fake_redis):
+        """A Redis HIT fills the local layer; the next read skips Redis."""
+        fake_redis.store["forex:test"] = "{}"
+
+        assert await get_cached_bytes("forex:test") == b"{}"
+        assert await get_cached_bytes("forex:test") == b"{}"
+        assert fake_redis.gets == 1
+
+    async def test_entry_expires_after_ttl(self, fake_redis, clock):
+        """After LOCAL_CACHE_TTL the value is read from Redis again."""
+        await set_cached_bytes("forex:test", b"old", ttl=60)
+        fake_redis.store["forex:test"] = "new"
+
+        clock[0] += cache.LOCAL_CACHE_TTL - 0.1
+        assert await get_cached_bytes("forex:test") == b"old"
+        assert fake_redis.gets == 0
+
+        clock[0] += 0.2
+        assert await get_cached_bytes("forex:test") == b"new"
+        assert fake_redis.gets == 1
+
+    def test_fifo_eviction(self, monkeypatch):
+        """Beyond LOCAL_CACHE_MAX_KEYS the oldest key is evicted first."""
+        monkeypatch.setattr(cache, "LOCAL_CACHE_MAX_KEYS", 3)
+
+        for key in ("a", "b", "c"):
+            cache._set_local(key, b"{}")
+        cache._set_local("a", b"{}")  # re-setting moves it to the end
+        cache._set_local("d", b"{}")
+
+        assert list(cache._local_cache) == ["c", "a", "d"]
+
+    def test_default_capacity(self):
+        """The layer holds at most 64 keys by default."""
+        for i in range(cache.LOCAL_CACHE_MAX_KEYS + 1):
+            cache._set_local(f"forex:{i}", b"{}")
+
+        assert cache.LOCAL_CACHE_MAX_KEYS == 64
+        assert len(cache._local_cache) == 64
+        assert "forex:0" not in cache._local_cache
+
+    async def test_delete_and_clear_drop_local_entries(self, fake_redis):
+        """Stale local copies must not survive delete/clear."""
+        await set_cached_bytes("forex:a", b"{}", ttl=60)
+        await set_cached_bytes("forex:b", b"{}", ttl=60)
+
+        await delete_cached("forex:a")
+        await clear_forex_cache()
+
+        assert cache._local_cache == {}
+        assert await get_cached_bytes("forex:b") is None
@@ -94,6 +94,24 @@ with open('/etc/passwd') as f:
         is_valid, error = validate_code(code)
         assert is_valid is False
 
+    def test_rejects_open_with_space_before_paren(self):
+        """Should reject open() even with whitespace before the paren."""
+        is_valid, error = validate_code("f = open ('/etc/passwd')")
+        assert is_valid is False
+        assert "open (" in error
+
+    def test_error_names_matched_operation(self):
+        """Error message should quote the offending code."""
+        is_valid, error = validate_code("x = getattr(obj, 'y')")
+        assert is_valid is False
+        assert "getattr(" in error
+
+    def test_allows_names_containing_blocked_words(self):
+        """Identifiers merely containing blocked words are fine."""
+        code = "evaluation = 1\nreopen_count = 2\nposition = evaluation + reopen_count"
+        is_valid, _ = validate_code(code)
+        assert is_valid is True
+
     def test_rejects_dunder_import(self):
         """Should reject __import__ calls."""
         code = """
@@ -1,11 +1,17 @@
 """Tests for LLM Router with circuit breaker and fallback."""
 
-import pytest
+import asyncio
 import time
+from types import SimpleNamespace
+
+import pytest
 
+import app.llm_router as llm_router
 from app.llm_router import (
     CircuitBreaker,
+    LLMProvider,
     _sanitize_error,
+    call_llm,
     get_router_stats,
     reset_circuit_breakers,
 )
@@ -135,3 +141,59 @@ class TestResetCircuitBreakers:
                 if "circuit_breaker" in provider_info:
                     assert provider_info["circuit_breaker"]["failures"] == 0
                     assert provider_info["circuit_breaker"]["state"] == "closed"
+
+
+class TestCallCoalescing:
+    """Tests for sharing identical in-flight LLM calls."""
+
+    @pytest.fixture
+    def provider_calls(self, monkeypatch):
+        """Single fake provider that records each call."""
+        calls = []
+
+        async def fake_call_provider(provider, messages, max_tokens, stream):
+            calls.append(messages)
+            await asyncio.sleep(0.05)
+            message = SimpleNamespace(content=f"resposta {len(calls)}")
+            return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+        provider = LLMProvider(
+            name="fake",
+            model="fake-model",
+            api_key="key",
+            circuit_breaker=CircuitBreaker("fake"),
+        )
+        monkeypatch.setattr(llm_router, "_providers", [provider])
+        monkeypatch.setattr(llm_router, "_initialized", True)
+        monkeypatch.setattr(llm_router, "_call_provider", fake_call_provider)
+        return calls
+
+    @pytest.mark.asyncio
+    async def test_identical_concurrent_calls_share_provider_call(self, provider_calls):
+        """Concurrent identical requests should hit the provider once."""
+        messages = [{"role": "user", "content": "Como está o dólar?"}]
+
+        results = await asyncio.gather(*(call_llm(messages) for _ in range(5)))
+
+        assert len(provider_calls) == 1
+        assert results == ["resposta 1"] * 5
+
+    @pytest.mark.asyncio
+    async def test_different_calls_not_shared(self, provider_calls):
+        """Different payloads should each reach the provider."""
+        await asyncio.gather(
+            call_llm([{"role": "user", "content": "A"}]),
+            call_llm([{"role": "user", "content": "B"}]),
+        )
+
+        assert len(provider_calls) == 2
+
+    @pytest.mark.asyncio
+    async def test_sequential_calls_not_shared(self, provider_calls):
+        """A finished call should not be reused by later requests."""
+        messages = [{"role": "user", "content": "Como está o dólar?"}]
+
+        await call_llm(messages)
+        await call_llm(messages)
+
+        assert len(provider_calls) == 2
@@ -1,30 +1,68 @@
 """Tests for RAG SDK."""
 
-import os
-import tempfile
+import asyncio
+import hashlib
 
+import numpy as np
 import pytest
 
 from app.rag_sdk import SimpleRAG
+from app.rag_sdk.rag import EmbeddingWorker, load_embedding_model, quantize_int8
 
 
 @pytest.fixture
-def temp_db():
-    """Create temporary database for testing."""
-    with tempfile.NamedTemporaryFile(suffix=".db", delete=False) as f:
-        db_path = f.name
-    yield db_path
-    # Cleanup
-    if os.path.exists(db_path):
-        os.remove(db_path)
+def temp_db(tmp_path):
+    """Database file for tests that reopen it from a second instance."""
+    return str(tmp_path / "rag.db")
+
+
+def _without_fsync(instance):
+    """Skip fsync on a throwaway test database.
+
+    SimpleRAG already sets WAL, mmap and temp_store=MEMORY; only
+    synchronous=NORMAL is kept stricter than a temp file needs.
+    """
+    instance._get_connection().cursor().execute("PRAGMA synchronous=OFF")
+    return instance
+
+
+@pytest.fixture(scope="session")
+def shared_rag():
+    """In-memory RAG instance shared by the session (model loaded once)."""
+    instance = SimpleRAG(":memory:")
+    yield instance
+    instance.close()
+
+
+@pytest.fixture
+async def rag(shared_rag):
+    """Shared RAG instance, emptied before each test."""
+    await shared_rag.clear()
+    return shared_rag
 
 
 @pytest.fixture
-def rag(temp_db):
-    """Create RAG instance with temp database."""
-    return SimpleRAG(temp_db)
+def make_rag(temp_db):
+    """Factory for RAG instances on temp_db, all closed at teardown."""
+    instances = []
+
+    def make(**kwargs):
+        instance = _without_fsync(SimpleRAG(temp_db, **kwargs))
+        instances.append(instance)
+        return instance
 
+    yield make
+    for instance in instances:
+        instance.close()
 
+
+@pytest.fixture
+def fresh_rag(make_rag):
+    """RAG instance on its own database (for tests that rewrite the schema)."""
+    return make_rag()
+
+
+@pytest.mark.embedding
 class TestSimpleRAG:
     """Tests for SimpleRAG class."""
 
@@ -51,6 +89,64 @@ class TestSimpleRAG:
         doc_id2 = await rag.add_text(text, source="Test")
         assert doc_id2 is None
 
+    @pytest.mark.asyncio
+    async def test_legacy_sha256_hashes_are_migrated(self, fresh_rag, make_rag):
+        """Content stored under the old sha256 hash must still dedup."""
+        content = "Texto indexado com o hash antigo"
+        conn = fresh_rag._get_connection()
+        conn.cursor().execute(
+            "INSERT INTO documentos (source, content, hash) VALUES (?, ?, ?)",
+            ("legacy", content, hashlib.sha256(content.encode()).hexdigest()[:16]),
+        )
+        conn.cursor().execute("PRAGMA user_version = 0")
+        conn.close()
+
+        migrated = make_rag()
+        assert await migrated.add_text(content) is None
+
+    @pytest.mark.asyncio
+    async def test_concurrent_add_text(self, rag):
+        """Concurrent add_text calls should all be stored, each once."""
+        contents = [f"Noticia {i} sobre o cambio" for i in range(10)]
+
+        doc_ids = await asyncio.gather(
+            *(rag.add_text(content, source=f"S{i}") for i, content in enumerate(contents))
+        )
+
+        assert None not in doc_ids
+        assert len(set(doc_ids)) == len(contents)
+        assert rag.stats()["total_embeddings"] == len(contents)
+
+    @pytest.mark.asyncio
+    async def test_add_texts_batch(self, rag):
+        """Should add a batch and return None for empty/duplicate entries."""
+        await rag.add_text("Texto ja indexado", source="Test")
+
+        doc_ids = await rag.add_texts(
+            ["Dolar fecha em alta", "Texto ja indexado", "", "Dolar fecha em alta"],
+            ["S1", "S2", "S3", "S4"],
+        )
+
+        assert doc_ids[0] is not None
+        assert doc_ids[1:] == [None, None, None]
+        assert rag.stats()["total_docs"] == 2
+        assert rag.stats()["total_embeddings"] == 2
+
+    @pytest.mark.asyncio
+    async def test_add_texts_pairs_vectors_with_documents(self, rag):
+        """Each batch document should be found by its own text."""
+        contents = [
+            "Banco Central eleva a taxa Selic",
+            "Exportadoras vendem dolares no fim do mes",
+            "Petroleo em alta pressiona a inflacao",
+        ]
+        doc_ids = await rag.add_texts(contents, ["S1", "S2", "S3"])
+
+        for content, doc_id in zip(contents, doc_ids):
+            results = await rag.search(content, top_k=1)
+            assert results[0].doc_id == doc_id
+            assert results[0].content == content
+
     @pytest.mark.asyncio
     async def test_search_returns_results(self, rag):
         """Should return search results."""
@@ -85,16 +181,42 @@ class TestSimpleRAG:
     @pytest.mark.asyncio
     async def test_search_top_k(self, rag):
         """Should respect top_k parameter."""
-        # Add multiple documents
-        for i in range(10):
-            await rag.add_text(
-                f"Documento numero {i} sobre o mercado de cambio",
-                source=f"Source {i}"
-            )
+        # Add multiple documents (one embedding batch, one transaction)
+        await rag.add_texts(
+            [f"Documento numero {i} sobre o mercado de cambio" for i in range(10)],
+            [f"Source {i}" for i in range(10)],
+        )
 
         results = await rag.search("mercado cambio", top_k=3)
         assert len(results) <= 3
 
+    @pytest.mark.asyncio
+    async def test_repeated_query_uses_embedding_cache(self, rag):
+        """Same query (modulo case/whitespace) should embed only once."""
+        await rag.add_text("Dolar sobe com tensoes fiscais", source="news")
+
+        first = await rag.search("Cotacao do dolar hoje")
+        before = rag.get_detailed_stats()["query_cache"]
+        second = await rag.search("  cotacao do DOLAR hoje ")
+        after = rag.get_detailed_stats()["query_cache"]
+
+        assert after["hits"] == before["hits"] + 1
+        assert after["misses"] == before["misses"]
+        assert [r.doc_id for r in first] == [r.doc_id for r in second]
+
+    @pytest.mark.asyncio
+    async def test_search_with_source_filter(self, rag):
+        """source_filter should return the top_k hits of that source only."""
+        await rag.add_texts(
+            [f"Dolar sobe na sessao {i}" for i in range(6)],
+            ["Reuters", "Valor"] * 3,
+        )
+
+        results = await rag.search("dolar sobe", top_k=3, source_filter="Valor")
+
+        assert len(results) == 3
+        assert all(r.source == "Valor" for r in results)
+
     def test_stats_empty_db(self, rag):
         """Should return stats for empty database."""
         stats = rag.stats()
@@ -107,8 +229,7 @@ class TestSimpleRAG:
     @pytest.mark.asyncio
     async def test_stats_with_docs(self, rag):
         """Should return correct stats after adding docs."""
-        await rag.add_text("Documento 1", source="S1")
-        await rag.add_text("Documento 2", source="S2")
+        await rag.add_texts(["Documento 1", "Documento 2"], ["S1", "S2"])
 
         stats = rag.stats()
         assert stats["total_docs"] == 2
@@ -132,6 +253,223 @@ class TestSimpleRAG:
         assert rag.stats()["total_docs"] == 0
 
 
+class TestEmbeddingModel:
+    """Tests for the process-wide embedding model."""
+
+    def test_model_shared_between_instances(self, make_rag, monkeypatch):
+        """Every SimpleRAG should reuse a single loaded model."""
+        loads = []
+
+        def fake_text_embedding(model_name):
+            loads.append(model_name)
+            return RecordingModel()
+
+        monkeypatch.setattr("app.rag_sdk.rag.TextEmbedding", fake_text_embedding)
+        load_embedding_model.cache_clear()
+        try:
+            first = make_rag().model
+            second = make_rag(quantize=True).model
+        finally:
+            load_embedding_model.cache_clear()
+
+        assert first is second
+        assert loads == [SimpleRAG.EMBEDDING_MODEL]
+
+    @pytest.mark.asyncio
+    async def test_stats_report_model_loaded_by_worker(self, make_rag, monkeypatch):
+        """Embedding through the shared worker should count as a loaded model."""
+        monkeypatch.setattr(
+            "app.rag_sdk.rag.TextEmbedding", lambda model_name: RecordingModel()
+        )
+        load_embedding_model.cache_clear()
+        try:
+            rag = make_rag()
+            assert rag.get_detailed_stats()["embedding_model_loaded"] is False
+
+            await rag.add_text("Dolar sobe com tensoes fiscais", source="news")
+            assert rag._model is None
+            assert rag.get_detailed_stats()["embedding_model_loaded"] is True
+        finally:
+            load_embedding_model.cache_clear()
+
+    def test_worker_shared_between_instances(self, shared_rag, fresh_rag):
+        """Every SimpleRAG should send embeddings to the same worker thread."""
+        assert shared_rag._embedder is fresh_rag._embedder
+
+
+@pytest.mark.embedding
+class TestCosineMetric:
+    """Tests for the cosine distance metric on vec_docs."""
+
+    @pytest.mark.asyncio
+    async def test_identical_text_has_similarity_one(self, rag):
+        """Unit-normalized vectors make 1 - distance an exact cosine."""
+        text = "Banco Central eleva a taxa Selic"
+        await rag.add_text(text, source="news")
+
+        results = await rag.search(text, top_k=1)
+        assert results[0].similarity == pytest.approx(1.0, abs=1e-3)
+
+    @pytest.mark.asyncio
+    async def test_legacy_l2_table_is_rebuilt(self, fresh_rag, make_rag):
+        """An L2 vec_docs from older versions is recreated with cosine."""
+        text = "Banco Central eleva a taxa Selic"
+        await fresh_rag.add_text(text, source="news")
+
+        conn = fresh_rag._get_connection()
+        cursor = conn.cursor()
+        rows = list(cursor.execute("SELECT doc_id, embedding FROM vec_docs"))
+        cursor.execute("DROP TABLE vec_docs")
+        cursor.execute(
+            "CREATE VIRTUAL TABLE vec_docs USING vec0("
+            "doc_id INTEGER PRIMARY KEY, embedding FLOAT[384])"
+        )
+        cursor.executemany("INSERT INTO vec_docs (doc_id, embedding) VALUES (?, ?)", rows)
+        conn.close()
+
+        migrated = make_rag()
+        sql = migrated._get_connection().cursor().execute(
+            "SELECT sql FROM sqlite_master WHERE name = 'vec_docs'"
+        ).fetchone()[0]
+        assert "distance_metric=cosine" in sql
+        assert migrated.stats()["status"] == "ok"
+        results = await migrated.search(text, top_k=1)
+        assert results[0].similarity == pytest.approx(1.0, abs=1e-3)
+
+
+class TestInt8Quantization:
+    """Tests for int8 embedding storage."""
+
+    def test_quantize_int8_uses_full_range(self):
+        """Largest component should map to +/-127."""
+        q = quantize_int8(np.array([0.1, -0.2, 0.05], dtype=np.float32))
+
+        assert q.dtype == np.int8
+        assert q.tolist() == [64, -127, 32]
+
+    @pytest.mark.embedding
+    @pytest.mark.asyncio
+    async def test_search_int8(self, make_rag):
+        """Quantized index should store and rank documents."""
+        rag = make_rag(quantize=True)
+        await rag.add_text("O dolar fechou em alta contra o real", source="S1")
+        await rag.add_text("Previsao do tempo indica chuvas fortes", source="S2")
+
+        results = await rag.search("dolar em alta", top_k=2)
+
+        assert rag.stats()["status"] == "ok"
+        assert results[0].source == "S1"
+        assert 0 <= results[0].similarity <= 1
+
+    @pytest.mark.embedding
+    @pytest.mark.asyncio
+    async def test_migrate_to_int8(self, fresh_rag, make_rag):
+        """Should copy existing float32 vectors into the int8 table."""
+        await fresh_rag.add_text("Documento 1", source="S1")
+        await fresh_rag.add_text("Documento 2", source="S2")
+
+        int8_rag = make_rag(quantize=True)
+        assert int8_rag.migrate_to_int8() == 2
+        assert int8_rag.migrate_to_int8() == 0
+        assert int8_rag.stats()["total_embeddings"] == 2
+
+
+class RecordingModel:
+    """Stub embedding model that records the size of each batch."""
+
+    def __init__(self, fail=False):
+        self.batches = []
+        self.fail = fail
+
+    def embed(self, texts, batch_size=32):
+        self.batches.append(len(texts))
+        if self.fail:
+            raise RuntimeError("model failure")
+        return [np.full(384, len(text), dtype=np.float32) for text in texts]
+
+
+class TestEmbeddingWorker:
+    """Tests for the dedicated embedding thread."""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_requests_share_a_batch(self):
+        """Requests inside the batching window run as one model call."""
+        model = RecordingModel()
+        worker = EmbeddingWorker(lambda: model, window=0.05)
+
+        results = await asyncio.gather(*(worker.embed(["x" * n]) for n in range(1, 6)))
+        worker.stop()
+
+        assert model.batches == [5]
+        assert [r[0][0] for r in results] == [1, 2, 3, 4, 5]
+
+    @pytest.mark.asyncio
+    async def test_batch_size_is_respected(self):
+        """Large submissions are split into batch_size chunks."""
+        model = RecordingModel()
+        worker = EmbeddingWorker(lambda: model, batch_size=4)
+
+        embeddings = await worker.embed(["a"] * 10)
+        worker.stop()
+
+        assert len(embeddings) == 10
+        assert model.batches == [4, 4, 2]
+
+    @pytest.mark.asyncio
+    async def test_model_errors_propagate(self):
+        """A failing model call fails every request in the batch."""
+        worker = EmbeddingWorker(lambda: RecordingModel(fail=True))
+
+        with pytest.raises(RuntimeError, match="model failure"):
+            await worker.embed(["a", "b"])
+        worker.stop()
+
+
+@pytest.mark.embedding
+class TestQueryResultCache:
+    """Tests for the proximity result cache."""
+
+    @pytest.fixture
+    def cached_rag(self, make_rag):
+        return make_rag(query_cache_threshold=0.97)
+
+    @pytest.mark.asyncio
+    async def test_near_query_served_from_cache(self, cached_rag):
+        """Repeating a query should not hit the vector table again."""
+        await cached_rag.add_text("Dolar sobe com tensoes fiscais", source="news")
+
+        first = await cached_rag.search("dolar tensoes", top_k=5)
+        second = await cached_rag.search("dolar tensoes", top_k=1)
+
+        stats = cached_rag.get_detailed_stats()["result_cache"]
+        assert stats["hits"] == 1
+        assert second == first[:1]
+
+    @pytest.mark.asyncio
+    async def test_larger_top_k_is_not_served_from_cache(self, cached_rag):
+        """A cached top_k smaller than requested must fall through."""
+        await cached_rag.add_text("Dolar sobe com tensoes fiscais", source="news")
+
+        await cached_rag.search("dolar tensoes", top_k=1)
+        await cached_rag.search("dolar tensoes", top_k=5)
+
+        assert cached_rag.get_detailed_stats()["result_cache"]["hits"] == 0
+
+    @pytest.mark.asyncio
+    async def test_cache_invalidated_on_insert(self, cached_rag, make_rag):
+        """New documents, from this or another instance, must be visible."""
+        await cached_rag.add_text("Dolar sobe com tensoes fiscais", source="news")
+        assert len(await cached_rag.search("dolar tensoes")) == 1
+
+        await cached_rag.add_text("Dolar cai apos tensoes aliviarem", source="news")
+        assert len(await cached_rag.search("dolar tensoes")) == 2
+
+        other = make_rag()
+        await other.add_text("Tensoes no cambio elevam o dolar", source="news")
+        assert len(await cached_rag.search("dolar tensoes")) == 3
+
+
+@pytest.mark.embedding
 class TestSearchResult:
     """Tests for search result structure."""
 
@@ -1,35 +1,58 @@
 """Tests for recommendation engine."""
 
+import asyncio
+from collections import OrderedDict
+
+import httpx
 import numpy as np
-import pandas as pd
 import pytest
 
+from app import recommendation
+from app.kernels import NUMBA_AVAILABLE, indicator_kernel
 from app.models import MarketClassification, TechnicalIndicators
-from app.recommendation import calculate_indicators, classify
+from app.recommendation import (
+    CLASSIFICATION_ORDER,
+    _ewm_mean,
+    _rsi,
+    _tail_mean,
+    _tail_std,
+    calculate_indicators,
+    classify,
+    classify_batch,
+    fetch_ohlc,
+    get_classification,
+)
 
 
 # Test fixtures
-@pytest.fixture
+@pytest.fixture(scope="session")
 def sample_ohlc_data():
-    """Create sample OHLC data for testing."""
+    """Create sample OHLC arrays for testing (built once, read-only)."""
     # 100 days of data
-    dates = pd.date_range(start="2024-01-01", periods=100, freq="D")
-    np.random.seed(42)  # Reproducibility
+    timestamps = 1704067200 + np.arange(100, dtype=np.int64) * 86400
+    rng = np.random.default_rng(42)  # Reproducibility
 
     # Generate realistic price data
     base_price = 5.0
-    returns = np.random.normal(0, 0.01, 100).cumsum()
+    returns = rng.normal(0, 0.01, 100).cumsum()
     close_prices = base_price + returns
 
-    df = pd.DataFrame({
-        "Open": close_prices * (1 + np.random.uniform(-0.005, 0.005, 100)),
-        "High": close_prices * (1 + np.random.uniform(0, 0.01, 100)),
-        "Low": close_prices * (1 - np.random.uniform(0, 0.01, 100)),
-        "Close": close_prices,
-        "Volume": np.random.randint(1000000, 10000000, 100),
-    }, index=dates)
+    # Open/high/low bands from a single uniform draw in [0, 1)
+    open_noise, high_noise, low_noise = rng.random((3, 100)) * 0.01
+    open_noise -= 0.005
 
-    return df
+    ohlc = {
+        "timestamp": timestamps,
+        "open": close_prices * (1 + open_noise),
+        "high": close_prices * (1 + high_noise),
+        "low": close_prices * (1 - low_noise),
+        "close": close_prices,
+        "volume": rng.integers(1000000, 10000000, 100).astype(np.float64),
+    }
+    # Shared by every test: mutating it must fail (copy first)
+    for values in ohlc.values():
+        values.setflags(write=False)
+    return ohlc
 
 
 @pytest.fixture
@@ -43,6 +66,10 @@ def bullish_indicators():
         bollinger_upper=5.60,
         bollinger_lower=5.10,
         bollinger_middle=5.35,
+        stochastic_k=50.0,
+        stochastic_d=50.0,
+        macd=0.0,
+        macd_signal=0.0,
     )
 
 
@@ -57,6 +84,10 @@ def bearish_indicators():
         bollinger_upper=5.50,
         bollinger_lower=5.00,
         bollinger_middle=5.25,
+        stochastic_k=50.0,
+        stochastic_d=50.0,
+        macd=0.0,
+        macd_signal=0.0,
     )
 
 
@@ -71,9 +102,167 @@ def volatile_indicators():
         bollinger_upper=5.55,
         bollinger_lower=5.05,
         bollinger_middle=5.30,
+        stochastic_k=50.0,
+        stochastic_d=50.0,
+        macd=0.0,
+        macd_signal=0.0,
     )
 
 
+def _chart_payload(closes):
+    """Minimal Yahoo chart API response with daily bars."""
+    timestamps = [1704067200 + i * 86400 for i in range(len(closes))]
+    return {
+        "chart": {
+            "result": [{
+                "timestamp": timestamps,
+                "indicators": {"quote": [{
+                    "open": closes,
+                    "high": closes,
+                    "low": closes,
+                    "close": closes,
+                    "volume": [0] * len(closes),
+                }]},
+            }],
+            "error": None,
+        }
+    }
+
+
+@pytest.fixture
+def yahoo_mock(monkeypatch):
+    """Route the Yahoo client through a mock transport; returns request log."""
+    requests = []
+    responses = {}
+
+    def handler(request):
+        requests.append(request)
+        status, payload = responses["next"]
+        return httpx.Response(status, json=payload)
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    monkeypatch.setattr(recommendation, "_yahoo_client", client)
+    monkeypatch.setattr(recommendation, "_ohlc_cache", {})
+    return requests, responses
+
+
+class TestFetchOhlc:
+    """Tests for fetch_ohlc against the Yahoo chart API."""
+
+    async def test_parses_chart_and_drops_empty_bars(self, yahoo_mock):
+        """Should build an OHLC frame, skipping bars without a close."""
+        requests, responses = yahoo_mock
+        responses["next"] = (200, _chart_payload([5.0, 5.1, None]))
+
+        ohlc = await fetch_ohlc("USDBRL=X", "5y")
+
+        assert set(ohlc) == {"timestamp", "open", "high", "low", "close", "volume"}
+        assert ohlc["close"].tolist() == [5.0, 5.1]
+        assert ohlc["close"].dtype == np.float64
+        assert len(ohlc["timestamp"]) == 2
+        assert requests[0].url.params["range"] == "5y"
+        assert requests[0].url.path.endswith("/USDBRL=X")
+
+    async def test_repeated_calls_share_one_request(self, yahoo_mock):
+        """Calls within the TTL bucket should reuse the response."""
+        requests, responses = yahoo_mock
+        responses["next"] = (200, _chart_payload([5.0, 5.1]))
+
+        first = await fetch_ohlc("USDBRL=X", "5y")
+        second = await fetch_ohlc("USDBRL=X", "5y")
+
+        assert len(requests) == 1
+        assert second is first
+
+    async def test_concurrent_misses_share_one_download(self, yahoo_mock):
+        """Concurrent misses should await a single in-flight request."""
+        requests, responses = yahoo_mock
+        responses["next"] = (200, _chart_payload([5.0, 5.1]))
+
+        results = await asyncio.gather(*(fetch_ohlc("USDBRL=X", "5y") for _ in range(5)))
+
+        assert len(requests) == 1
+        assert all(result is results[0] for result in results)
+        assert not recommendation._ohlc_inflight
+
+    async def test_concurrent_misses_share_the_error(self, yahoo_mock):
+        """A failed download should fail every waiter without retrying."""
+        requests, responses = yahoo_mock
+        responses["next"] = (500, {"chart": {"result": None}})
+
+        results = await asyncio.gather(
+            *(fetch_ohlc("USDBRL=X", "5y") for _ in range(3)),
+            return_exceptions=True,
+        )
+
+        assert len(requests) == 1
+        assert all(isinstance(result, ValueError) for result in results)
+
+    async def test_expired_entry_is_refetched(self, yahoo_mock, monkeypatch):
+        """Entries older than cache_ttl_ohlc should hit Yahoo again."""
+        requests, responses = yahoo_mock
+        responses["next"] = (200, _chart_payload([5.0, 5.1]))
+
+        await fetch_ohlc("USDBRL=X", "5y")
+        monkeypatch.setattr(recommendation.settings, "cache_ttl_ohlc", 0)
+        await fetch_ohlc("USDBRL=X", "5y")
+
+        assert len(requests) == 2
+
+    async def test_clear_ohlc_cache(self, yahoo_mock):
+        """clear_ohlc_cache should force the next call to refetch."""
+        requests, responses = yahoo_mock
+        responses["next"] = (200, _chart_payload([5.0, 5.1]))
+
+        await fetch_ohlc("USDBRL=X", "5y")
+        recommendation.clear_ohlc_cache()
+        await fetch_ohlc("USDBRL=X", "5y")
+
+        assert len(requests) == 2
+
+    async def test_http_error_raises_value_error(self, yahoo_mock):
+        """Upstream failures surface as ValueError like an empty download."""
+        _, responses = yahoo_mock
+        responses["next"] = (404, {"chart": {"result": None}})
+
+        with pytest.raises(ValueError):
+            await fetch_ohlc("INVALID=X", "5y")
+
+
+class TestGetClassification:
+    """Tests for the classification result cache."""
+
+    @pytest.fixture(autouse=True)
+    def _fresh_cache(self, monkeypatch):
+        monkeypatch.setattr(recommendation, "_classification_cache", OrderedDict())
+
+    async def test_reuses_result_for_same_bars(self, yahoo_mock):
+        """Unchanged bars should return the cached classification."""
+        _, responses = yahoo_mock
+        closes = [5.0 + 0.01 * i for i in range(60)]
+        responses["next"] = (200, _chart_payload(closes))
+
+        first = await get_classification()
+        recommendation.clear_ohlc_cache()
+        second = await get_classification()
+
+        assert second is first
+
+    async def test_recomputes_when_last_close_changes(self, yahoo_mock):
+        """A revised last close should produce a new classification."""
+        _, responses = yahoo_mock
+        closes = [5.0 + 0.01 * i for i in range(60)]
+        responses["next"] = (200, _chart_payload(closes))
+        first = await get_classification()
+
+        recommendation.clear_ohlc_cache()
+        responses["next"] = (200, _chart_payload(closes[:-1] + [closes[-1] * 1.05]))
+        second = await get_classification()
+
+        assert second is not first
+        assert second.indicators.current_price == pytest.approx(closes[-1] * 1.05)
+
+
 class TestCalculateIndicators:
     """Tests for calculate_indicators function."""
 
@@ -108,6 +297,48 @@ class TestCalculateIndicators:
         assert result.bollinger_lower < result.bollinger_middle < result.bollinger_upper
 
 
+class TestEwmMean:
+    """Tests for the NumPy exponential moving average."""
+
+    @pytest.mark.parametrize("n", [1, 2, 127, 128, 129, 1300])
+    @pytest.mark.parametrize("span", [9, 12, 26])
+    def test_matches_pandas_ewm(self, n, span):
+        """Should match pandas ewm(span).mean() across block boundaries."""
+        pd = pytest.importorskip("pandas")
+        values = 5.0 + np.random.default_rng(n).normal(0, 0.01, n).cumsum()
+
+        expected = pd.Series(values).ewm(span=span).mean().to_numpy()
+        np.testing.assert_allclose(_ewm_mean(values, span), expected, rtol=1e-12)
+
+
+@pytest.mark.skipif(not NUMBA_AVAILABLE, reason="numba not installed")
+class TestIndicatorKernel:
+    """Tests for the Numba indicator kernel."""
+
+    def test_matches_numpy_path(self, sample_ohlc_data):
+        """Kernel should match the NumPy implementation."""
+        close = sample_ohlc_data["close"]
+        current, sma20, sma50, rsi, bb_upper, bb_lower, bb_middle = indicator_kernel(close)
+        bb_std = _tail_std(close, 20)
+
+        assert current == close[-1]
+        assert sma20 == pytest.approx(_tail_mean(close, 20))
+        assert sma50 == pytest.approx(_tail_mean(close, 50))
+        assert rsi == pytest.approx(_rsi(close, 14))
+        assert bb_upper == pytest.approx(sma20 + 2 * bb_std)
+        assert bb_lower == pytest.approx(sma20 - 2 * bb_std)
+        assert bb_middle == sma20
+
+    def test_short_history(self):
+        """Windows longer than the history should yield NaN."""
+        close = np.linspace(5.0, 5.1, 10)
+        _, sma20, sma50, rsi, _, _, _ = indicator_kernel(close)
+
+        assert np.isnan(sma20)
+        assert np.isnan(sma50)
+        assert rsi == 50.0
+
+
 class TestClassify:
     """Tests for classify function."""
 
@@ -138,6 +369,10 @@ class TestClassify:
             bollinger_upper=5.50,
             bollinger_lower=5.10,
             bollinger_middle=5.30,
+            stochastic_k=50.0,
+            stochastic_d=50.0,
+            macd=0.0,
+            macd_signal=0.0,
         )
         result = classify(neutral)
         assert result.classification == MarketClassification.NEUTRAL
@@ -161,12 +396,67 @@ class TestClassify:
         total = sum(result.features_importance.values())
         assert abs(total - 1.0) < 0.01
 
+    def test_feature_importance_is_shared_and_read_only(self, bullish_indicators):
+        """All results share one immutable weights mapping."""
+        first = classify(bullish_indicators)
+        second = classify(bullish_indicators)
+
+        assert first.features_importance is second.features_importance
+        with pytest.raises(TypeError):
+            first.features_importance["rsi_signal"] = 1.0
+
     def test_confidence_bounded(self, bullish_indicators):
         """Confidence should be between 0 and 1."""
         result = classify(bullish_indicators)
         assert 0.0 <= result.confidence <= 1.0
 
 
+class TestClassifyBatch:
+    """Tests for the vectorized classifier."""
+
+    def test_matches_scalar_classify(
+        self, bullish_indicators, bearish_indicators, volatile_indicators
+    ):
+        """Should agree with classify() for every case."""
+        neutral = TechnicalIndicators(
+            current_price=5.30,
+            sma20=5.29,
+            sma50=5.28,
+            rsi=50.0,
+            bollinger_upper=5.50,
+            bollinger_lower=5.10,
+            bollinger_middle=5.30,
+            stochastic_k=50.0,
+            stochastic_d=50.0,
+            macd=0.0,
+            macd_signal=0.0,
+        )
+        cases = [bullish_indicators, bearish_indicators, volatile_indicators, neutral]
+
+        labels, confidence, _ = classify_batch(
+            np.array([c.current_price for c in cases]),
+            np.array([c.sma50 for c in cases]),
+            np.array([c.rsi for c in cases]),
+            np.array([c.bollinger_upper for c in cases]),
+            np.array([c.bollinger_lower for c in cases]),
+        )
+
+        for i, indicators in enumerate(cases):
+            expected = classify(indicators)
+            assert CLASSIFICATION_ORDER[labels[i]] == expected.classification
+            assert confidence[i] == pytest.approx(expected.confidence)
+
+    def test_zero_band_range(self):
+        """Flat Bollinger bands should not divide by zero."""
+        labels, _, features = classify_batch(
+            np.array([5.0]), np.array([5.0]), np.array([50.0]),
+            np.array([5.0]), np.array([5.0]),
+        )
+
+        assert features["bb_position"][0] == 0.5
+        assert CLASSIFICATION_ORDER[labels[0]] == MarketClassification.NEUTRAL
+
+
 class TestIntegration:
     """Integration tests."""
 
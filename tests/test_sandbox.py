@@ -0,0 +1,220 @@
+"""Tests for the E2B sandbox pool (fake Sandbox, no network)."""
+
+import asyncio
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+from app import sandbox as sandbox_module
+from app.config import settings
+from app.sandbox import execute_analysis_code, get_sandbox_status
+
+
+class FakeSandbox:
+    """Minimal stand-in for e2b_code_interpreter.Sandbox."""
+
+    _ids = 0
+
+    def __init__(self, fail_with: Exception | None = None, delay: float = 0.0):
+        FakeSandbox._ids += 1
+        self.sandbox_id = f"fake-{FakeSandbox._ids}"
+        self.fail_with = fail_with
+        self.delay = delay
+        self.closed = False
+        self.calls = 0
+
+    def run_code(self, code: str):
+        self.calls += 1
+        if self.fail_with is not None:
+            raise self.fail_with
+        if self.delay:
+            threading.Event().wait(self.delay)
+        return SimpleNamespace(
+            logs=SimpleNamespace(stdout=["ok\n"]),
+            text="42",
+            results=[],
+            error=None,
+        )
+
+    def close(self):
+        self.closed = True
+
+
+class FakeFactory:
+    """Replacement for _create_sandbox that hands out queued fakes."""
+
+    def __init__(self, *sandboxes):
+        self.queue = list(sandboxes)
+        self.created = 0
+
+    def __call__(self):
+        if not self.queue:
+            return None
+        sandbox = self.queue.pop(0)
+        if sandbox is None:
+            return None
+        self.created += 1
+        return sandbox
+
+
+@pytest.fixture(autouse=True)
+def _fresh_pool(monkeypatch):
+    """Empty pool and E2B 'configured' for every test."""
+    monkeypatch.setattr(sandbox_module, "_pool", None)
+    monkeypatch.setattr(sandbox_module, "_sandboxes", [])
+    monkeypatch.setattr(sandbox_module, "_creating", 0)
+    monkeypatch.setattr(sandbox_module, "_waiting", 0)
+    monkeypatch.setattr(settings, "e2b_api_key", "test-key")
+    monkeypatch.setattr(settings, "e2b_pool_size", 2)
+    monkeypatch.setattr(settings, "e2b_acquire_timeout", 2)
+
+
+def _use_factory(monkeypatch, *sandboxes) -> FakeFactory:
+    factory = FakeFactory(*sandboxes)
+    monkeypatch.setattr(sandbox_module, "_create_sandbox", factory)
+    return factory
+
+
+class TestSandboxPool:
+    """Tests for checkout/release of pooled sandboxes."""
+
+    async def test_reuses_sandbox_across_calls(self, monkeypatch):
+        """Sequential calls should run on the same sandbox."""
+        fake = FakeSandbox()
+        factory = _use_factory(monkeypatch, fake, FakeSandbox())
+
+        first = await execute_analysis_code("print(1)")
+        second = await execute_analysis_code("print(2)")
+
+        assert first["sandbox_id"] == second["sandbox_id"] == fake.sandbox_id
+        assert first["result"] == "42"
+        assert factory.created == 1
+        assert fake.calls == 2
+
+    async def test_concurrency_bounded_by_pool_size(self, monkeypatch):
+        """Never more sandboxes than e2b_pool_size, even under load."""
+        factory = _use_factory(
+            monkeypatch, *(FakeSandbox(delay=0.05) for _ in range(5))
+        )
+
+        results = await asyncio.gather(
+            *(execute_analysis_code("print(1)") for _ in range(6))
+        )
+
+        assert all(r["error"] is None for r in results)
+        assert factory.created == 2
+        assert len({r["sandbox_id"] for r in results}) == 2
+        assert sandbox_module._get_pool().qsize() == 2
+
+    async def test_raises_when_e2b_unavailable(self, monkeypatch):
+        """No sandbox at all should surface as ValueError."""
+        _use_factory(monkeypatch)
+
+        with pytest.raises(ValueError, match="não disponível"):
+            await execute_analysis_code("print(1)")
+
+    async def test_waiter_times_out_when_pool_busy(self, monkeypatch):
+        """A waiter on a busy pool should give up after the acquire timeout."""
+        monkeypatch.setattr(settings, "e2b_pool_size", 1)
+        monkeypatch.setattr(settings, "e2b_acquire_timeout", 0.05)
+        _use_factory(monkeypatch, FakeSandbox())
+
+        held = await sandbox_module._acquire_sandbox()
+        assert held is not None
+
+        assert await sandbox_module._acquire_sandbox() is None
+
+    def test_status_does_not_create_sandboxes(self, monkeypatch):
+        """The health check only reads the pool state."""
+        factory = _use_factory(monkeypatch, FakeSandbox())
+
+        status = get_sandbox_status()
+
+        assert status["status"] == "ready"
+        assert status["sandboxes"] == 0
+        assert factory.created == 0
+        assert sandbox_module._sandboxes == []
+
+
+class TestSandboxRecovery:
+    """Tests for discarding expired sandboxes and replacing them."""
+
+    async def test_expired_sandbox_is_replaced(self, monkeypatch):
+        """An expired sandbox is discarded and the code reruns on a new one."""
+        expired = FakeSandbox(fail_with=RuntimeError("sandbox not found"))
+        fresh = FakeSandbox()
+        _use_factory(monkeypatch, expired, fresh)
+
+        result = await execute_analysis_code("print(1)")
+
+        assert result["error"] is None
+        assert result["sandbox_id"] == fresh.sandbox_id
+        assert expired.closed
+        assert expired not in sandbox_module._sandboxes
+        assert sandbox_module._get_pool().qsize() == 1
+
+    async def test_failed_recreate_frees_slot(self, monkeypatch):
+        """If the replacement cannot be created, the next call creates one."""
+        monkeypatch.setattr(settings, "e2b_pool_size", 1)
+        expired = FakeSandbox(fail_with=RuntimeError("502 Bad Gateway"))
+        fresh = FakeSandbox()
+        _use_factory(monkeypatch, expired, None, fresh)
+
+        failed = await execute_analysis_code("print(1)")
+        assert "recriar" in failed["error"]
+        assert sandbox_module._sandboxes == []
+
+        result = await asyncio.wait_for(execute_analysis_code("print(1)"), 1)
+        assert result["sandbox_id"] == fresh.sandbox_id
+
+    async def test_cancel_during_reacquire_does_not_release_discarded(self, monkeypatch):
+        """Cancelling while waiting for a replacement must not requeue the dead sandbox."""
+        held = FakeSandbox()
+        expired = FakeSandbox(fail_with=RuntimeError("sandbox not found"))
+        _use_factory(monkeypatch, held, expired, None)
+
+        assert await sandbox_module._acquire_sandbox() is held
+        task = asyncio.create_task(execute_analysis_code("print(1)"))
+        while sandbox_module._waiting == 0:
+            await asyncio.sleep(0.01)
+
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+        assert expired.closed
+        assert sandbox_module._get_pool().empty()
+        assert sandbox_module._sandboxes == [held]
+
+    async def test_discard_wakes_waiter(self, monkeypatch):
+        """A waiter blocked on a full pool gets a replacement after a discard."""
+        monkeypatch.setattr(settings, "e2b_pool_size", 1)
+        dead, fresh = FakeSandbox(), FakeSandbox()
+        _use_factory(monkeypatch, dead, fresh)
+
+        held = await sandbox_module._acquire_sandbox()
+        waiter = asyncio.create_task(sandbox_module._acquire_sandbox())
+        await asyncio.sleep(0)
+        assert sandbox_module._waiting == 1
+
+        sandbox_module._discard_sandbox(held)
+
+        assert await asyncio.wait_for(waiter, 1) is fresh
+        assert dead.closed
+
+    async def test_discard_logs_close_errors(self, monkeypatch, caplog):
+        """Errors while closing a dead sandbox are logged, not raised."""
+        broken = FakeSandbox()
+
+        def fail_close():
+            raise RuntimeError("already gone")
+
+        broken.close = fail_close
+        sandbox_module._sandboxes.append(broken)
+
+        with caplog.at_level("WARNING", logger="app.sandbox"):
+            sandbox_module._discard_sandbox(broken)
+
+        assert broken not in sandbox_module._sandboxes
+        assert "already gone" in caplog.text